@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+GitFichas Image Pipeline Benchmarks
+===================================
+
+Measures the stages of the image generation pipeline on the real corpus
+(_posts, en/_posts, es/_posts) and on a synthetic corpus of generated posts
+(see synthetic_corpus.py):
+
+- parse:   reading and parsing front matter (posts/s);
+- load:    PostCorpus with a cold and a warm post index (posts/s);
+- syntax:  MermaidDiagramGenerator (diagrams/s);
+- css:     ConfigManager.create_combined_css (builds/s);
+- render:  each render backend on its own (diagrams/s); stub and native by
+           default, pool and cli when asked for with --backends (they need
+           Node and Chromium);
+- pipeline: the whole generator with the stub renderer, cold (every card
+           rendered), up to date (every card skipped by the render cache)
+           and from cache (images deleted, copied back from the cache).
+           Every image written or skipped counts, including the copies of
+           identical diagrams (deduplicated), which are also reported on
+           their own so runs with other duplicate ratios can be compared.
+
+Each benchmark runs --repeat times and the median is kept. Results are
+written to benchmarks/results/<commit>.json, and --compare REF prints the
+change against the results stored for another commit.
+
+Usage:
+    python3 benchmarks/run_benchmarks.py [--posts N] [--repeat N] [--backends stub,native,pool,cli]
+                                         [--render-sample N] [--only NAME,...] [--compare REF]
+
+Examples:
+    python3 benchmarks/run_benchmarks.py                       # Everything, stub and native renders
+    python3 benchmarks/run_benchmarks.py --only parse,syntax   # Just the front matter stages
+    python3 benchmarks/run_benchmarks.py --compare HEAD~1      # Compare with the previous commit's results
+"""
+
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARKS_DIR.parent
+RESULTS_DIR = BENCHMARKS_DIR / 'results'
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+from config_manager import ConfigManager
+from generate_images_only import MermaidImageOnlyGenerator
+from mermaid_generator import MermaidDiagramGenerator
+from post_corpus import PostCorpus, parse_front_matter, read_front_matter
+from post_index import PostIndex
+from renderers import RenderError, create_renderer
+from synthetic_corpus import build_corpus
+
+BENCHMARKS = ['parse', 'load', 'syntax', 'css', 'render', 'pipeline']
+
+
+def measure(function: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """Run a benchmark `repeat` times; function returns how many items it processed."""
+    runs = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = function()
+        runs.append(time.perf_counter() - start)
+
+    seconds = statistics.median(runs)
+    return {'items': items, 'seconds': seconds, 'per_second': items / seconds if seconds else 0.0, 'runs': runs}
+
+
+def get_post_paths(config: ConfigManager) -> List[Path]:
+    """Every post of a project, in directory order."""
+    return [path for posts_dir in config.posts_dirs if posts_dir.exists() for path in sorted(posts_dir.glob('*.md'))]
+
+
+def bench_parse(config: ConfigManager, repeat: int) -> Dict[str, Dict]:
+    """Read and parse the front matter of every post."""
+    paths = get_post_paths(config)
+
+    def run():
+        for path in paths:
+            parse_front_matter(read_front_matter(path)[0])
+        return len(paths)
+
+    return {'parse': measure(run, repeat)}
+
+
+def bench_load(config: ConfigManager, repeat: int) -> Dict[str, Dict]:
+    """Load every post through PostCorpus, with an empty and with a populated post index."""
+    paths = get_post_paths(config)
+    index_path = Path(tempfile.mkdtemp(prefix='bench-index-')) / 'post-index.json'
+
+    def cold():
+        index_path.unlink(missing_ok=True)
+        PostCorpus(config, PostIndex(index_path, config.root_dir)).load(paths)
+        return len(paths)
+
+    def warm():
+        PostCorpus(config, PostIndex(index_path, config.root_dir)).load(paths)
+        return len(paths)
+
+    try:
+        results = {'load_cold_index': measure(cold, repeat)}
+        results['load_warm_index'] = measure(warm, repeat)
+        return results
+    finally:
+        shutil.rmtree(index_path.parent, ignore_errors=True)
+
+
+def get_front_matters(config: ConfigManager) -> List[Dict]:
+    """Front matter of every mermaid post."""
+    front_matters = [parse_front_matter(read_front_matter(path)[0]) for path in get_post_paths(config)]
+    return [front_matter for front_matter in front_matters if front_matter.get('mermaid')]
+
+
+def get_syntaxes(config: ConfigManager) -> List[str]:
+    """Mermaid syntax of every mermaid post."""
+    syntaxes = [MermaidDiagramGenerator.generate_from_front_matter(front_matter)
+                for front_matter in get_front_matters(config)]
+    return [syntax for syntax in syntaxes if syntax]
+
+
+def bench_syntax(config: ConfigManager, repeat: int) -> Dict[str, Dict]:
+    """Generate the Mermaid syntax of every mermaid post from parsed front matter."""
+    front_matters = get_front_matters(config)
+
+    def run():
+        for front_matter in front_matters:
+            MermaidDiagramGenerator.generate_from_front_matter(front_matter)
+        return len(front_matters)
+
+    return {'syntax': measure(run, repeat)}
+
+
+def bench_css(config: ConfigManager, repeat: int) -> Dict[str, Dict]:
+    """Build the combined CSS (theme stylesheet plus embedded fonts) ten times per run."""
+    def run():
+        for _ in range(10):
+            config.create_combined_css()
+        return 10
+
+    try:
+        return {'css': measure(run, repeat)}
+    finally:
+        config.cleanup_temp_files()
+
+
+def bench_render(config: ConfigManager, repeat: int, backends: List[str], sample: int) -> Dict[str, Dict]:
+    """Render a sample of diagrams with each backend, outside the generator."""
+    syntaxes = get_syntaxes(config)[:sample]
+    work_dir = Path(tempfile.mkdtemp(prefix='bench-render-'))
+    config.create_combined_css()
+    results = {}
+
+    try:
+        for backend in backends:
+            try:
+                renderer = create_renderer(config, backend)
+            except (RenderError, OSError) as e:
+                print(f"  ⚠ Skipping render_{backend}: {e}")
+                continue
+
+            def run():
+                for index, syntax in enumerate(syntaxes):
+                    renderer.render(syntax, work_dir / f"{index}.svg")
+                return len(syntaxes)
+
+            try:
+                results[f'render_{backend}'] = measure(run, repeat)
+            except RenderError as e:
+                print(f"  ⚠ render_{backend} failed: {e}")
+            finally:
+                renderer.close()
+    finally:
+        config.cleanup_temp_files()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return results
+
+
+def bench_pipeline(config: ConfigManager, repeat: int) -> Dict[str, Dict]:
+    """Run the whole generator with the stub renderer: cold, up to date and copying from the cache.
+
+    Uses a copy of the project so neither the real images nor the real cache are touched.
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix='bench-pipeline-'))
+    project = work_dir / 'project'
+    shutil.copytree(config.root_dir, project, ignore=shutil.ignore_patterns(
+        '.git', '.mermaid-cache', 'node_modules', '_site', 'mermaid', 'benchmarks'))
+
+    deduplicated = {}
+
+    def run_generator(force: bool = False) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = MermaidImageOnlyGenerator(str(project), backend='stub', jobs=1, timeout=None, retries=0)
+            generator.process_files(force=force)
+        counts = generator.stats.get_stats()
+        deduplicated['last'] = counts['total_deduplicated']
+        return (counts['total_success'] + counts['total_cached'] + counts['total_skipped']
+                + counts['total_deduplicated'])
+
+    def measure_pipeline(function: Callable[[], int]) -> Dict[str, float]:
+        result = measure(function, repeat)
+        result['deduplicated'] = deduplicated['last']
+        return result
+
+    def cold():
+        shutil.rmtree(project / '.mermaid-cache', ignore_errors=True)
+        return run_generator(force=True)
+
+    def up_to_date():
+        return run_generator()
+
+    def from_cache():
+        images_dir = ConfigManager(str(project)).images_dir
+        for image_path in images_dir.glob('*.svg'):
+            image_path.unlink()
+        return run_generator()
+
+    try:
+        results = {'pipeline_cold': measure_pipeline(cold)}
+        results['pipeline_up_to_date'] = measure_pipeline(up_to_date)
+        results['pipeline_from_cache'] = measure_pipeline(from_cache)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_suite(config: ConfigManager, only: List[str], repeat: int, backends: List[str],
+              sample: int) -> Dict[str, Dict]:
+    """Run the selected benchmarks against one corpus."""
+    results = {}
+    for name in only:
+        print(f"  Running {name}...")
+        if name == 'parse':
+            results.update(bench_parse(config, repeat))
+        elif name == 'load':
+            results.update(bench_load(config, repeat))
+        elif name == 'syntax':
+            results.update(bench_syntax(config, repeat))
+        elif name == 'css':
+            results.update(bench_css(config, repeat))
+        elif name == 'render':
+            results.update(bench_render(config, repeat, backends, sample))
+        elif name == 'pipeline':
+            results.update(bench_pipeline(config, repeat))
+    return results
+
+
+def get_commit(ref: str = 'HEAD') -> Optional[str]:
+    """Short hash of a git ref, or None outside a git checkout."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', ref], cwd=REPO_ROOT,
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def is_dirty() -> bool:
+    """Check whether the working tree has uncommitted changes to the pipeline."""
+    try:
+        result = subprocess.run(['git', 'status', '--porcelain', '--', 'scripts', 'benchmarks',
+                                 'gitfichas-mermaid-theme.json', 'assets/css'],
+                                cwd=REPO_ROOT, capture_output=True, text=True)
+    except OSError:
+        return False
+    return bool(result.stdout.strip())
+
+
+def get_results_path(commit: Optional[str], dirty: bool = False) -> Path:
+    """Where the results for a commit are stored."""
+    name = commit or 'unversioned'
+    return RESULTS_DIR / f"{name}{'-dirty' if dirty else ''}.json"
+
+
+def print_results(results: Dict[str, Dict[str, Dict]], baseline: Optional[Dict] = None):
+    """Print throughput per corpus and benchmark, with the change against a baseline."""
+    for corpus, benchmarks in results.items():
+        print(f"\n{corpus}:")
+        for name, result in benchmarks.items():
+            line = (f"  {name:<22} {result['items']:>6} items  {result['seconds'] * 1000:>9.1f} ms  "
+                    f"{result['per_second']:>10.1f}/s")
+            if result.get('deduplicated'):
+                line += f"  ({result['deduplicated']} deduplicated)"
+            previous = (baseline or {}).get(corpus, {}).get(name)
+            if previous and previous['per_second']:
+                change = (result['per_second'] - previous['per_second']) / previous['per_second'] * 100
+                line += f"  ({change:+.1f}% vs baseline)"
+            print(line)
+
+
+def main():
+    """Main function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the GitFichas image generation pipeline')
+    parser.add_argument('--posts', type=int, default=3000,
+                        help='Posts in the synthetic corpus, 0 to only use the real corpus (default: 3000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark; the median is kept (default: 3)')
+    parser.add_argument('--backends', default='stub,native',
+                        help='Comma-separated render backends to measure (default: stub,native)')
+    parser.add_argument('--render-sample', type=int, default=200,
+                        help='Diagrams rendered per backend and run (default: 200)')
+    parser.add_argument('--only', help=f"Comma-separated benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--compare', metavar='REF', help='Compare with the stored results of a git ref')
+    parser.add_argument('--no-save', action='store_true', help="Don't store the results")
+
+    args = parser.parse_args()
+
+    only = args.only.split(',') if args.only else BENCHMARKS
+    unknown = set(only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    backends = args.backends.split(',')
+
+    results = {}
+    print("Benchmarking the real corpus...")
+    results['real'] = run_suite(ConfigManager(str(REPO_ROOT)), only, args.repeat, backends, args.render_sample)
+
+    if args.posts > 0:
+        synthetic_dir = Path(tempfile.mkdtemp(prefix='gitfichas-synthetic-'))
+        try:
+            print(f"Benchmarking a synthetic corpus of {args.posts} posts...")
+            config = build_corpus(synthetic_dir, args.posts)
+            results[f'synthetic_{args.posts}'] = run_suite(config, only, args.repeat, backends, args.render_sample)
+        finally:
+            shutil.rmtree(synthetic_dir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        baseline_path = get_results_path(get_commit(args.compare))
+        try:
+            baseline = json.loads(baseline_path.read_text(encoding='utf-8'))['results']
+        except (OSError, ValueError, KeyError):
+            print(f"⚠ No stored results for {args.compare} ({baseline_path.name})")
+
+    print_results(results, baseline)
+
+    if not args.no_save:
+        commit = get_commit()
+        results_path = get_results_path(commit, is_dirty())
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        results_path.write_text(json.dumps({
+            'commit': commit,
+            'dirty': is_dirty(),
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'options': {'posts': args.posts, 'repeat': args.repeat, 'backends': backends,
+                        'render_sample': args.render_sample},
+            'results': results
+        }, indent=2), encoding='utf-8')
+        print(f"\n📁 Results written to: {results_path.relative_to(REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
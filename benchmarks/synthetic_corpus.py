@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Synthetic Corpus for GitFichas Benchmarks
+=========================================
+
+Builds a throwaway project with thousands of posts, so the pipeline can be
+measured at a scale the real corpus won't reach for years. Posts are cloned
+from the real mermaid posts of each language, renumbered, and their
+descriptors are suffixed so every card has a distinct diagram (no render
+cache hits between clones).
+
+The project also gets the theme file and stylesheets the generator needs.
+
+Usage:
+    python3 benchmarks/synthetic_corpus.py OUTPUT_DIR [--posts N]
+"""
+
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+from config_manager import ConfigManager
+from post_corpus import parse_front_matter, read_front_matter
+
+# Inputs the generator reads besides the posts
+PROJECT_FILES = [
+    'gitfichas-mermaid-theme.json',
+    'assets/css/embedded-svg.css',
+    'assets/css/embedded-fonts.css'
+]
+
+
+def load_templates(config: ConfigManager) -> Dict[Path, List[Dict[str, Any]]]:
+    """Front matter of the real mermaid posts, per posts directory."""
+    templates = {}
+    for posts_dir in config.posts_dirs:
+        templates[posts_dir] = []
+        for path in sorted(posts_dir.glob('*.md')):
+            front_matter = parse_front_matter(read_front_matter(path)[0])
+            if front_matter.get('mermaid'):
+                templates[posts_dir].append(front_matter)
+    return templates
+
+
+def make_variant(front_matter: Dict[str, Any], number: str, index: int) -> Dict[str, Any]:
+    """Clone a post's front matter under a new number, with a distinct diagram."""
+    variant = dict(front_matter)
+    variant['number'] = number
+    variant['permalink'] = f"/projects/{number}"
+    variant['descriptors'] = [{key: f"{value} #{index}" for key, value in entry.items()}
+                              for entry in front_matter.get('descriptors') or [] if isinstance(entry, dict)]
+    return variant
+
+
+def build_corpus(output_dir: Path, posts: int = 3000, source_dir: Path = REPO_ROOT) -> ConfigManager:
+    """Write a synthetic project with about `posts` mermaid posts, split evenly across languages."""
+    source = ConfigManager(source_dir)
+    templates = load_templates(source)
+
+    for relative_path in PROJECT_FILES:
+        target = output_dir / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source.root_dir / relative_path, target)
+
+    config = ConfigManager(output_dir)
+    per_dir = posts // len(config.posts_dirs)
+
+    for source_posts_dir, posts_dir in zip(source.posts_dirs, config.posts_dirs):
+        posts_dir.mkdir(parents=True, exist_ok=True)
+        dir_templates = templates[source_posts_dir]
+        if not dir_templates:
+            continue
+
+        for index in range(per_dir):
+            number = f"{index + 1:05d}"
+            front_matter = make_variant(dir_templates[index % len(dir_templates)], number, index)
+            text = yaml.safe_dump(front_matter, allow_unicode=True, sort_keys=False)
+            (posts_dir / f"2030-01-01-{number}.md").write_text(
+                f"---\n{text}---\n\n{{% include mermaid-graphs.html %}}\n", encoding='utf-8'
+            )
+
+    return config
+
+
+def main():
+    """Main function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build a synthetic GitFichas project for benchmarks')
+    parser.add_argument('output_dir', help='Directory to create the project in')
+    parser.add_argument('--posts', type=int, default=3000, help='Number of posts to generate (default: 3000)')
+
+    args = parser.parse_args()
+
+    config = build_corpus(Path(args.output_dir), args.posts)
+    print(f"✓ Wrote {sum(len(list(d.glob('*.md'))) for d in config.posts_dirs)} posts to {config.root_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Change Detection for GitFichas Mermaid Generator
+================================================
+
+Decides which posts need to be loaded at all, before any markdown is read:
+
+- changed since a git ref: posts whose markdown changed, or every post when a
+  shared input (theme, CSS, render-path code) changed;
+- incremental: posts changed since their image was last verified, or every
+  image last verified before a shared input changed, compared by modification
+  time.
+
+The render-path code is the modules that shape an image (RENDER_PATH_MODULES);
+tooling such as the render server, sharding or backend comparison isn't a
+shared input. An image is verified when it is written or found up to date (see
+render_cache.py); images are never rewritten unchanged, so their own mtime
+is only used for images verified before verification times were recorded.
+"""
+
+import subprocess
+from pathlib import Path
+from typing import List, Set
+
+from config_manager import ConfigManager
+from render_cache import RenderCache
+
+# Scripts whose changes can change rendered images (and their variants)
+RENDER_PATH_MODULES = (
+    'config_manager',
+    'font_subsetter',
+    'generate_images_only',
+    'image_manifest',
+    'mermaid_generator',
+    'native_renderer',
+    'post_corpus',
+    'renderers',
+    'shared_fonts',
+    'svg_normalizer',
+    'svg_optimizer',
+    'theme_variants',
+    'thumbnails',
+)
+
+
+def get_shared_input_paths(config: ConfigManager) -> List[Path]:
+    """Files that affect every rendered image when they change."""
+    scripts_dir = Path(__file__).parent
+    return [
+        config.theme_path,
+        config.base_mermaid_css_path,
+        config.embedded_fonts_css_path,
+        config.sidecar_script_path,
+        *(scripts_dir / f"{name}.py" for name in RENDER_PATH_MODULES)
+    ]
+
+
+def get_changed_files(root_dir: Path, ref: str) -> Set[Path]:
+    """Files changed since a git ref, including uncommitted and untracked files."""
+    commands = [
+        ['git', 'diff', '--name-only', ref, '--'],
+        ['git', 'ls-files', '--others', '--exclude-standard']
+    ]
+
+    top_level = _run_git(['git', 'rev-parse', '--show-toplevel'], root_dir).strip()
+    changed = set()
+
+    for cmd in commands:
+        for name in _run_git(cmd, root_dir).splitlines():
+            if name:
+                changed.add((Path(top_level) / name).resolve())
+
+    return changed
+
+
+def _run_git(cmd: List[str], cwd: Path) -> str:
+    """Run a git command and return its output."""
+    try:
+        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise RuntimeError("git not found; --changed-since requires a git checkout")
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed: {result.stderr.strip()}")
+
+    return result.stdout
+
+
+def select_changed_since(config: ConfigManager, post_paths: List[Path], ref: str) -> List[Path]:
+    """Select the posts affected by changes since a git ref."""
+    changed = get_changed_files(config.root_dir, ref)
+
+    if any(path.resolve() in changed for path in get_shared_input_paths(config)):
+        return list(post_paths)
+
+    return [path for path in post_paths if path.resolve() in changed]
+
+
+def select_incremental(config: ConfigManager, post_paths: List[Path], cache: RenderCache) -> List[Path]:
+    """Select the posts whose image is missing or was last verified before the post or a shared input changed."""
+    shared_mtime = max(
+        (path.stat().st_mtime for path in get_shared_input_paths(config) if path.exists()),
+        default=0
+    )
+
+    selected = []
+    for post_path in post_paths:
+        image_path = config.get_default_image_path(post_path)
+        if not image_path.exists():
+            # Non-mermaid posts and failed renders have no image to compare against
+            selected.append(post_path)
+            continue
+
+        verified = max(image_path.stat().st_mtime, cache.get_verified_time(image_path) or 0)
+        if post_path.stat().st_mtime > verified or shared_mtime > verified:
+            selected.append(post_path)
+
+    return selected
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Native vs Mermaid Comparison for GitFichas
+==========================================
+
+Renders every mermaid post with the native renderer and compares the result
+with the existing Mermaid-rendered image in assets/img/mermaid/:
+
+- canvas size (viewBox width and height);
+- position and size of every node, matched by id;
+- node text.
+
+Nothing is written to the images directory.
+
+Usage:
+    python3 scripts/compare_backends.py [filter] [--tolerance PX] [--verbose] [--json FILE]
+
+Examples:
+    python3 scripts/compare_backends.py                 # Compare all posts
+    python3 scripts/compare_backends.py "053.md" -v     # Show every node of matching posts
+    python3 scripts/compare_backends.py --tolerance 10  # Only report differences over 10px
+"""
+
+import html
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from generate_images_only import MermaidImageOnlyGenerator
+from native_renderer import NativeRenderer
+
+
+VIEWBOX_PATTERN = re.compile(r'<svg\b[^>]*\bviewBox="([^"]+)"')
+NODE_PATTERN = re.compile(r'<g\b[^>]*\bclass="node\b[^"]*"[^>]*>')
+ATTRIBUTE_PATTERN = re.compile(r'([\w:-]+)="([^"]*)"')
+TRANSLATE_PATTERN = re.compile(r'translate\(\s*(-?[\d.]+)[ ,]+(-?[\d.]+)\s*\)')
+RECT_PATTERN = re.compile(r'<rect\b([^>]*)>')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def extract_layout(svg: str) -> Dict:
+    """Extract the canvas size and every node's centre, size and text from an SVG."""
+    viewbox = VIEWBOX_PATTERN.search(svg)
+    width, height = [float(value) for value in viewbox.group(1).split()[2:]] if viewbox else (0.0, 0.0)
+
+    nodes = {}
+    matches = list(NODE_PATTERN.finditer(svg))
+    for index, match in enumerate(matches):
+        attributes = dict(ATTRIBUTE_PATTERN.findall(match.group(0)))
+        translate = TRANSLATE_PATTERN.search(attributes.get('transform', ''))
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(svg)
+        segment = svg[match.end():end]
+
+        # The stylesheet follows the last node in Mermaid's output
+        style_start = segment.find('<style')
+        if style_start != -1:
+            segment = segment[:style_start]
+
+        rect = RECT_PATTERN.search(segment)
+        rect_attributes = dict(ATTRIBUTE_PATTERN.findall(rect.group(1))) if rect else {}
+
+        nodes[attributes.get('id', str(index))] = {
+            'x': float(translate.group(1)) if translate else 0.0,
+            'y': float(translate.group(2)) if translate else 0.0,
+            'width': float(rect_attributes.get('width', 0)),
+            'height': float(rect_attributes.get('height', 0)),
+            'text': ' '.join(html.unescape(TAG_PATTERN.sub(' ', segment)).split())
+        }
+
+    return {'width': width, 'height': height, 'nodes': nodes}
+
+
+def compare_layouts(mermaid: Dict, native: Dict) -> Dict:
+    """Compare two extracted layouts, returning the differences."""
+    node_diffs = {}
+    for node_id, expected in mermaid['nodes'].items():
+        actual = native['nodes'].get(node_id)
+        if actual is None:
+            node_diffs[node_id] = {'missing': True}
+            continue
+
+        node_diffs[node_id] = {
+            key: round(actual[key] - expected[key], 2) for key in ('x', 'y', 'width', 'height')
+        }
+        node_diffs[node_id]['text_matches'] = actual['text'] == expected['text']
+
+    extra = sorted(set(native['nodes']) - set(mermaid['nodes']))
+    offsets = [abs(value) for diff in node_diffs.values() for key, value in diff.items()
+               if key in ('x', 'y', 'width', 'height')]
+
+    return {
+        'width': round(native['width'] - mermaid['width'], 2),
+        'height': round(native['height'] - mermaid['height'], 2),
+        'max_node_offset': max(offsets, default=0.0),
+        'missing_nodes': sorted(node_id for node_id, diff in node_diffs.items() if diff.get('missing')),
+        'extra_nodes': extra,
+        'text_mismatches': sorted(node_id for node_id, diff in node_diffs.items()
+                                  if not diff.get('missing') and not diff['text_matches']),
+        'nodes': node_diffs
+    }
+
+
+def is_within(result: Dict, tolerance: float) -> bool:
+    """Check whether a comparison has no structural differences and stays within tolerance."""
+    return (abs(result['width']) <= tolerance and abs(result['height']) <= tolerance
+            and result['max_node_offset'] <= tolerance and not result['missing_nodes']
+            and not result['extra_nodes'] and not result['text_mismatches'])
+
+
+def compare_posts(filename_filter: Optional[str] = None, tolerance: float = 1.0,
+                  verbose: bool = False) -> List[Dict]:
+    """Compare native and Mermaid output for every mermaid post with an existing image."""
+    generator = MermaidImageOnlyGenerator(backend='native')
+    renderer = NativeRenderer(generator.config)
+    renderer.start()
+    results = []
+
+    try:
+        for posts_dir in generator.config.posts_dirs:
+            for file_path in sorted(posts_dir.glob('*.md')):
+                if filename_filter and filename_filter not in file_path.name:
+                    continue
+
+                post = generator.corpus.load_post(file_path)
+                front_matter = post.front_matter
+
+                if not post.is_mermaid:
+                    continue
+
+                mermaid_syntax = post.mermaid_syntax
+                image_path = generator.config.get_image_path(front_matter, file_path)
+                if not mermaid_syntax or not image_path.exists():
+                    continue
+
+                result = {'post': str(file_path.relative_to(generator.config.root_dir)),
+                          'image': str(image_path.relative_to(generator.config.root_dir))}
+                try:
+                    native_layout = extract_layout(renderer.render(mermaid_syntax))
+                except Exception as e:
+                    result['error'] = str(e)
+                    results.append(result)
+                    print(f"✗ {result['post']}: native render failed: {e}")
+                    continue
+
+                mermaid_layout = extract_layout(image_path.read_text(encoding='utf-8'))
+                result.update(compare_layouts(mermaid_layout, native_layout))
+                result['within_tolerance'] = is_within(result, tolerance)
+                results.append(result)
+                print_result(result, verbose)
+    finally:
+        renderer.close()
+        generator.close()
+
+    return results
+
+
+def print_result(result: Dict, verbose: bool):
+    """Print one post's comparison."""
+    mark = '✓' if result['within_tolerance'] else '✗'
+    print(f"{mark} {result['post']}: canvas {result['width']:+.1f} x {result['height']:+.1f}px, "
+          f"max node offset {result['max_node_offset']:.1f}px")
+
+    for label, key in (('missing nodes', 'missing_nodes'), ('extra nodes', 'extra_nodes'),
+                       ('text differs', 'text_mismatches')):
+        if result[key]:
+            print(f"    {label}: {', '.join(result[key])}")
+
+    if verbose:
+        for node_id, diff in result['nodes'].items():
+            if not diff.get('missing'):
+                print(f"    {node_id}: x {diff['x']:+.1f} y {diff['y']:+.1f} "
+                      f"w {diff['width']:+.1f} h {diff['height']:+.1f}")
+
+
+def main():
+    """Main function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare native renderer output with existing Mermaid images')
+    parser.add_argument('filter', nargs='?', help='Filter posts by filename')
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help='Largest difference in pixels still reported as matching (default: 1)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show the difference for every node')
+    parser.add_argument('--json', metavar='FILE', help='Also write the full comparison to a JSON file')
+
+    args = parser.parse_args()
+
+    results = compare_posts(args.filter, args.tolerance, args.verbose)
+    matching = sum(1 for result in results if result.get('within_tolerance'))
+
+    print(f"\n📊 {matching}/{len(results)} posts match within {args.tolerance:g}px")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"📁 Comparison written to: {args.json}")
+
+    sys.exit(0 if matching == len(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,13 @@ Configuration Manager for GitFichas Mermaid Generator
 Handles configuration, paths, and CSS management for the image generation system.
 """
 
+import hashlib
 import json
 import re
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+import theme_variants
 
 
 class ConfigManager:
@@ -18,6 +21,7 @@ class ConfigManager:
     def __init__(self, root_dir: str = "."):
         self.root_dir = Path(root_dir)
         self._setup_paths()
+        self._setup_render_settings()
         self._setup_directories()
 
     def _setup_paths(self):
@@ -28,17 +32,54 @@ class ConfigManager:
             self.root_dir / "en" / "_posts",
             self.root_dir / "es" / "_posts"
         ]
+        self.posts_dir_langs = dict(zip(self.posts_dirs, ['pt', 'en', 'es']))
 
-        # Output directory
+        # Output directories
         self.images_dir = self.root_dir / "assets" / "img" / "mermaid"
+        self.shared_fonts_images_dir = self.images_dir / "shared-fonts"
+        self.thumbnails_dir = self.images_dir / "thumbnails"
+        self.fingerprinted_images_dir = self.images_dir / "fingerprinted"
+        self.theme_variants_images_dir = self.images_dir / "themes"
+
+        # Jekyll data files listing the home-page grid thumbnails (see thumbnails.py)
+        # and the fingerprinted images (see image_manifest.py)
+        self.thumbnails_manifest_path = self.root_dir / "_data" / "mermaid_thumbnails.json"
+        self.images_manifest_path = self.root_dir / "_data" / "mermaid_images.json"
+
+        # Jekyll data file listing the cards with an up-to-date static image (see static_coverage.py)
+        self.coverage_data_path = self.root_dir / "_data" / "mermaid_coverage.json"
 
         # CSS file paths
         self.base_mermaid_css_path = self.root_dir / 'assets' / 'css' / 'embedded-svg.css'
         self.embedded_fonts_css_path = self.root_dir / 'assets' / 'css' / 'embedded-fonts.css'
         self.combined_css_path = self.root_dir / 'combined-mermaid.css'
 
-        # Theme configuration
+        # Site URL of the font stylesheet imported by shared-font SVGs
+        self.shared_fonts_url = '/assets/css/embedded-fonts.css'
+
+        # Theme configuration; named variants (e.g. gitfichas-mermaid-theme-dark.json) recolor
+        # the cards rendered with the base theme (see theme_variants.py)
         self.theme_path = self.root_dir / 'gitfichas-mermaid-theme.json'
+        self.theme_variant_pattern = 'gitfichas-mermaid-theme-*.json'
+
+        # Persistent render cache (see render_cache.py) and post index (see post_index.py)
+        self.cache_dir = self.root_dir / '.mermaid-cache'
+        self.post_index_path = self.cache_dir / 'post-index.json'
+
+    def _setup_render_settings(self):
+        """Setup the rendering parameters shared by all render backends."""
+        self.background_color = 'white'
+        self.image_width = 1200
+        self.image_height = 675
+
+        # Long-lived renderer sidecar (see renderers.py)
+        self.sidecar_script_path = Path(__file__).parent / 'render_sidecar.mjs'
+
+        # Resolved Mermaid CLI, recorded by the toolchain probe (see toolchain.py);
+        # until then mmdc is resolved through npx
+        self.toolchain_state_path = self.cache_dir / 'toolchain.json'
+        self.mermaid_cli_path = None
+        self.mermaid_cli_module = None
 
     def _setup_directories(self):
         """Create required directories if they don't exist."""
@@ -58,6 +99,29 @@ class ConfigManager:
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in theme file {self.theme_path}: {e}")
 
+    def get_theme_variant_paths(self) -> Dict[str, Path]:
+        """Get the named theme variant files by name (gitfichas-mermaid-theme-<name>.json)."""
+        prefix = self.theme_path.stem + '-'
+        return {path.stem[len(prefix):]: path for path in sorted(self.root_dir.glob(self.theme_variant_pattern))}
+
+    def load_theme_variant(self, name: str) -> Dict[str, str]:
+        """Load the color map of a named theme variant, normalized (see theme_variants.py)."""
+        paths = self.get_theme_variant_paths()
+        if name not in paths:
+            available = ', '.join(paths) or 'none'
+            raise ValueError(f"Unknown theme '{name}' (available: {available}); "
+                             f"add {self.theme_path.stem}-{name}.json to the project root")
+
+        try:
+            with open(paths[name], 'r', encoding='utf-8') as f:
+                theme = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in theme file {paths[name]}: {e}")
+
+        if not isinstance(theme.get('colorMap'), dict) or not theme['colorMap']:
+            raise ValueError(f"Theme file {paths[name]} has no colorMap")
+        return theme_variants.parse_color_map(theme['colorMap'])
+
     def create_combined_css(self) -> Path:
         """Create combined CSS file with embedded fonts for Mermaid CLI."""
         try:
@@ -90,25 +154,89 @@ class ConfigManager:
         """Clean up temporary files."""
         self.combined_css_path.unlink(missing_ok=True)
 
+    def use_toolchain(self, toolchain: Dict[str, Any]):
+        """Use the Mermaid CLI executable and module resolved by the toolchain probe."""
+        if toolchain.get('mmdc'):
+            self.mermaid_cli_path = toolchain['mmdc']['path']
+        if toolchain.get('module_path'):
+            self.mermaid_cli_module = Path(toolchain['module_path'])
+
     def get_mermaid_cli_command(self, temp_file: Path, output_path: Path) -> list:
         """Get the Mermaid CLI command arguments."""
-        return [
-            'npx', '@mermaid-js/mermaid-cli',
+        executable = [self.mermaid_cli_path] if self.mermaid_cli_path else ['npx', '@mermaid-js/mermaid-cli']
+        return executable + [
             '-i', str(temp_file),
             '-o', str(output_path),
-            '-b', 'white',
-            '--width', '1200',
-            '--height', '675',
+            '-b', self.background_color,
+            '--width', str(self.image_width),
+            '--height', str(self.image_height),
             '-e', 'svg',
             '--configFile', str(self.theme_path),
             '--cssFile', str(self.combined_css_path)
         ]
 
+    def get_render_options(self) -> Dict[str, Any]:
+        """Get the render options for the long-lived renderer, mirroring the CLI arguments."""
+        with open(self.theme_path, 'r', encoding='utf-8') as f:
+            mermaid_config = json.load(f)
+
+        with open(self.combined_css_path, 'r', encoding='utf-8') as f:
+            css = f.read()
+
+        return {
+            'width': self.image_width,
+            'height': self.image_height,
+            'backgroundColor': self.background_color,
+            'mermaidConfig': mermaid_config,
+            'css': css
+        }
+
+    def get_render_fingerprint(self, output_options: Optional[Dict[str, Any]] = None) -> str:
+        """Hash every render input shared by all diagrams: theme, combined CSS, render arguments
+        and post-processing options."""
+        digest = hashlib.sha256()
+
+        for path in (self.theme_path, self.combined_css_path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+            digest.update(b'\0')
+
+        render_args = {
+            'background': self.background_color,
+            'width': self.image_width,
+            'height': self.image_height,
+            'format': 'svg',
+            'output': output_options or {}
+        }
+        digest.update(json.dumps(render_args, sort_keys=True).encode('utf-8'))
+
+        return digest.hexdigest()
+
     def get_image_path(self, front_matter: Dict[str, Any], file_path: Path) -> Path:
         """Determine the output image path based on front matter and file path."""
         number = front_matter.get('number', file_path.stem.split('-')[-1])
         lang = front_matter.get('lang', 'pt')
+        return self._get_image_path_for(number, lang)
+
+    def get_default_image_path(self, file_path: Path) -> Path:
+        """Guess the output image path from the post location alone, without reading the post."""
+        lang = self.posts_dir_langs.get(file_path.parent, 'pt')
+        return self._get_image_path_for(file_path.stem.split('-')[-1], lang)
+
+    def get_theme_variant_image_path(self, image_path: Path, theme: str) -> Path:
+        """Get the path of a named theme variant of an image."""
+        return self.theme_variants_images_dir / theme / image_path.name
+
+    def get_shared_fonts_image_path(self, image_path: Path) -> Path:
+        """Get the path of the shared-font variant of an image."""
+        return self.shared_fonts_images_dir / image_path.name
+
+    def get_thumbnail_image_path(self, image_path: Path) -> Path:
+        """Get the path of the grid thumbnail of an image."""
+        return self.thumbnails_dir / image_path.name
 
+    def _get_image_path_for(self, number: str, lang: str) -> Path:
+        """Build the output image path for a card number and language."""
         if lang == 'en':
             image_filename = f"{number}-en.svg"
         elif lang == 'es':
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Font Subsetting for GitFichas Mermaid Generator
+===============================================
+
+Every rendered SVG embeds the complete Chilanka and Borel fonts (~700 KB of
+base64). This module rewrites those @font-face blocks so each SVG only carries
+the glyphs its own text uses.
+
+Requires fontTools (pip install fonttools).
+"""
+
+import base64
+import html
+import io
+import re
+from typing import Dict, Set
+
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    font_subset = None
+    TTFont = None
+
+
+FONT_FACE_PATTERN = re.compile(
+    r"@font-face\s*\{[^}]*?font-family:\s*'(?P<family>[^']+)'[^}]*?"
+    r"url\(data:font/(?P<format>[\w-]+);base64,(?P<data>[A-Za-z0-9+/=]+)\)",
+    re.DOTALL
+)
+NODE_PATTERN = re.compile(r'<g\b[^>]*\bclass="node\b(?P<classes>[^"]*)"[^>]*>')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Fonts only applied to nodes with a given class; any other font gets all text
+FONT_CLASSES = {
+    'Borel': 'commandFont',
+}
+
+# Always kept so fallback line breaks and spacing render the same
+BASE_CHARACTERS = ' '
+
+
+def is_available() -> bool:
+    """Check whether fontTools is installed."""
+    return font_subset is not None
+
+
+def collect_node_text(svg: str) -> Dict[str, str]:
+    """Collect the text of each diagram node, keyed by node class list."""
+    texts = {}
+    matches = list(NODE_PATTERN.finditer(svg))
+
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(svg)
+        segment = svg[match.end():end]
+
+        # The stylesheet follows the last node; it's not text
+        style_start = segment.find('<style')
+        if style_start != -1:
+            segment = segment[:style_start]
+
+        text = html.unescape(TAG_PATTERN.sub('', segment))
+        classes = match.group('classes')
+        texts[classes] = texts.get(classes, '') + text
+
+    return texts
+
+
+def get_font_characters(svg: str) -> Dict[str, Set[str]]:
+    """Get the set of characters each embedded font has to render."""
+    node_texts = collect_node_text(svg)
+    all_characters = set(''.join(node_texts.values())) | set(BASE_CHARACTERS)
+
+    characters = {}
+    for family in {match.group('family') for match in FONT_FACE_PATTERN.finditer(svg)}:
+        font_class = FONT_CLASSES.get(family)
+        if font_class is None:
+            characters[family] = all_characters
+        else:
+            text = ''.join(t for classes, t in node_texts.items() if font_class in classes.split())
+            characters[family] = set(text) | set(BASE_CHARACTERS)
+
+    return characters
+
+
+def subset_font(font_data: bytes, characters: Set[str]) -> bytes:
+    """Subset a font to the given characters, keeping its layout features."""
+    options = font_subset.Options()
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(text=''.join(sorted(characters)))
+
+    # Keep the original modification time, so the same subset gives the same bytes on every run
+    font = TTFont(io.BytesIO(font_data), recalcTimestamp=False)
+    subsetter.subset(font)
+
+    output = io.BytesIO()
+    font.save(output)
+    return output.getvalue()
+
+
+def subset_svg_fonts(svg: str) -> str:
+    """Replace every embedded font in the SVG with a subset of the glyphs it uses."""
+    characters = get_font_characters(svg)
+
+    def replace(match: re.Match) -> str:
+        font_data = base64.b64decode(match.group('data'))
+        subset_data = subset_font(font_data, characters[match.group('family')])
+        encoded = base64.b64encode(subset_data).decode('ascii')
+        return match.group(0).replace(match.group('data'), encoded)
+
+    return FONT_FACE_PATTERN.sub(replace, svg)
@@ -11,23 +11,47 @@ automatically detect and use static images when available, falling back to
 dynamic rendering when not.
 
 Usage:
-    python3 scripts/generate_images_only.py [filter]
+    python3 scripts/generate_images_only.py [filter] [--number N] [--lang pt|en|es] [--command CMD] [--backend auto|pool|cli|native] [--jobs N] [--batch] [--timeout SECONDS] [--retries N] [--report FILE] [--watch] [--shard I/N]
 
 Examples:
     python3 scripts/generate_images_only.py           # Generate images for all mermaid posts
     python3 scripts/generate_images_only.py "053.md"  # Generate images only for posts with "053.md" in filename
+    python3 scripts/generate_images_only.py --number 053 --lang en  # Structured filters
+    python3 scripts/generate_images_only.py --command "git log"     # Posts whose command contains "git log"
+    python3 scripts/generate_images_only.py --backend cli  # Spawn one Mermaid CLI process per diagram
+    python3 scripts/generate_images_only.py --backend native  # Lay out cards in Python, no Node/Chromium
+    python3 scripts/generate_images_only.py --jobs 1       # Render one post at a time
+    python3 scripts/generate_images_only.py --batch        # Render all pending diagrams in one Mermaid CLI run
+    python3 scripts/generate_images_only.py --timeout 30 --retries 1  # Give up on a render after 30s, retry once
+    python3 scripts/generate_images_only.py --report run.json  # Write stage timings and output sizes as JSON
+    python3 scripts/generate_images_only.py --watch        # Keep re-rendering cards as posts are saved
+    python3 scripts/generate_images_only.py --coverage     # Render every card lacking a static image, write _data coverage
+    python3 scripts/generate_images_only.py --adopt        # Trust existing images as up to date (e.g. after cloning)
+    python3 scripts/generate_images_only.py --force --shard 2/4  # Render a quarter of the cards (CI node 2 of 4)
+    python3 scripts/generate_images_only.py --changed-since origin/main  # Only posts changed since a git ref
+    python3 scripts/generate_images_only.py --incremental  # Only posts newer than their image
+    python3 scripts/generate_images_only.py --subset-fonts # Embed only the glyphs each card uses
+    python3 scripts/generate_images_only.py --optimize     # Strip unused CSS/defs, shorten ids, round coordinates
+    python3 scripts/generate_images_only.py --shared-fonts # Also write variants importing one shared font stylesheet
+    python3 scripts/generate_images_only.py --thumbnails   # Also write compact home-page grid thumbnails
+    python3 scripts/generate_images_only.py --themes dark  # Also write recolored variants from gitfichas-mermaid-theme-dark.json
+    python3 scripts/generate_images_only.py --fingerprint  # Also write content-hashed images and _data/mermaid_images.json
 
 Author: GitHub Copilot
 License: MIT
 """
 
+import asyncio
+import filecmp
 import os
-import re
-import yaml
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 # Add the scripts directory to Python path for imports
 script_dir = Path(__file__).parent
@@ -35,18 +59,73 @@ if str(script_dir) not in sys.path:
     sys.path.insert(0, str(script_dir))
 
 # Import our new modules
+from change_detection import select_changed_since, select_incremental
 from config_manager import ConfigManager
-from mermaid_generator import MermaidDiagramGenerator
-from utils import StatsTracker, Logger
+import font_subsetter
+import image_manifest
+import native_renderer
+import shared_fonts
+import sharding
+import static_coverage
+import svg_normalizer
+import svg_optimizer
+import theme_variants
+import thumbnails
+from post_corpus import PostCorpus, PostRecord
+from post_index import PostIndex
+from post_search import PostSearchIndex
+from post_watcher import PostWatcher
+from render_cache import RenderCache
+from render_scheduler import RenderScheduler
+from renderers import RENDER_BACKENDS, MermaidCliRenderer, RenderError, create_renderer
+from toolchain import load_toolchain
+from utils import StatsTracker, Logger, format_bytes
 
 
 class MermaidImageOnlyGenerator:
     """Main generator class that orchestrates the image generation process."""
 
-    def __init__(self, root_dir: str = ".", verbose: bool = False):
+    def __init__(self, root_dir: str = ".", verbose: bool = False, backend: str = "auto", jobs: int = 1,
+                 subset_fonts: bool = False, optimize: bool = False, shared_fonts: bool = False,
+                 timeout: Optional[float] = 60.0, retries: int = 2, hardlink_duplicates: bool = False,
+                 thumbnails: bool = False, fingerprint: bool = False, themes: Optional[List[str]] = None):
         self.config = ConfigManager(root_dir)
         self.stats = StatsTracker()
         self.logger = Logger(verbose)
+        self.backend = backend
+        self.jobs = max(1, jobs)
+        self.output_options = {'subset_fonts': subset_fonts, 'optimize': optimize,
+                               'normalize': svg_normalizer.NORMALIZATION_VERSION}
+        if backend in ('native', 'stub'):
+            # Native and stub output differ from Mermaid's, so they must not share cache entries
+            self.output_options['renderer'] = backend
+        if backend == 'native':
+            # Output of earlier native renderer versions is not reused
+            self.output_options['renderer_version'] = native_renderer.NATIVE_RENDERER_VERSION
+        self.shared_fonts = shared_fonts
+        self.thumbnails = thumbnails
+        self.themes = themes or []
+        # Color map of each named theme variant, loaded in _initialize
+        self.theme_color_maps = {}
+        self.thumbnail_manifest = None
+        self.image_manifest = image_manifest.ImageManifest(
+            self.config.images_manifest_path, self.config.root_dir, self.config.fingerprinted_images_dir
+        ) if fingerprint else None
+        self.renderer = None
+        self._renderer_lock = threading.Lock()
+        self.scheduler = RenderScheduler(self.render, self.jobs, timeout, retries)
+        self._loop = None
+        self._scheduled = set()
+        # Post each image is rendered for, to attribute stage timings
+        self._image_posts = {}
+        # Outcome per image (post, cache key, status), for shard manifests
+        self.image_results = {}
+        # Image rendered in this run for each cache key, fanned out to identical diagrams
+        self._run_images = {}
+        self.hardlink_duplicates = hardlink_duplicates
+        self._cancelled = threading.Event()
+        self.cache = RenderCache(self.config.cache_dir, self.config.root_dir)
+        self.corpus = PostCorpus(self.config, PostIndex(self.config.post_index_path, self.config.root_dir))
 
         # Initialize configuration
         self._initialize()
@@ -54,180 +133,853 @@ class MermaidImageOnlyGenerator:
     def _initialize(self):
         """Initialize the generator by validating configuration and creating CSS."""
         try:
+            if self.output_options['subset_fonts'] and not font_subsetter.is_available():
+                raise RuntimeError("--subset-fonts requires fontTools: pip install fonttools")
+            if self.thumbnails and not font_subsetter.is_available():
+                raise RuntimeError("--thumbnails requires fontTools: pip install fonttools")
+            try:
+                self.theme_color_maps = {name: self.config.load_theme_variant(name) for name in self.themes}
+            except ValueError as e:
+                raise RuntimeError(str(e))
+            if self.thumbnails:
+                self.thumbnail_manifest = thumbnails.ThumbnailManifest(self.config.thumbnails_manifest_path,
+                                                                       self.config.root_dir)
+
             self.config.validate_theme_file()
             self.logger.info(f"✓ Using theme file: {self.config.theme_path}")
 
-            self.config.create_combined_css()
+            with self.stats.time_stage(None, 'css'):
+                self.config.create_combined_css()
             self.logger.info(f"✓ Created combined CSS file: {self.config.combined_css_path}")
 
+            self.render_fingerprint = self.config.get_render_fingerprint(self.output_options)
+
         except Exception as e:
             self.logger.error(f"Initialization failed: {e}")
             raise
 
-    def extract_front_matter(self, content: str) -> tuple[Dict[str, Any], str]:
-        """Extract YAML front matter from markdown content."""
-        pattern = r'^---\s*\n(.*?\n)---\s*\n(.*)$'
-        match = re.match(pattern, content, re.DOTALL)
-
-        if not match:
-            return {}, content
-
-        front_matter_str = match.group(1)
-        body = match.group(2)
-
+    def _display_path(self, path: Path) -> str:
+        """Path relative to the project root, for messages."""
         try:
-            front_matter = yaml.safe_load(front_matter_str)
-            return front_matter or {}, body
-        except yaml.YAMLError as e:
-            self.logger.error(f"Error parsing YAML: {e}")
-            return {}, content
-
-    def generate_image(self, mermaid_syntax: str, output_path: Path) -> bool:
-        """Generate image from Mermaid syntax using Mermaid CLI."""
+            return path.relative_to(self.config.root_dir).as_posix()
+        except ValueError:
+            return str(path)
+
+    def get_renderer(self):
+        """Get the render backend, starting it on first use."""
+        with self._renderer_lock:
+            if self.renderer is None:
+                self.renderer = create_renderer(self.config, self.backend, self.logger, size=self.jobs,
+                                                timeout=self.scheduler.timeout)
+                self.logger.info(f"✓ Using render backend: {self.renderer.name}")
+            return self.renderer
+
+    def render(self, mermaid_syntax: str, output_path: Path, timeout: Optional[float] = None) -> str:
+        """Render one attempt with the configured backend; called by the scheduler."""
+        return self.get_renderer().render(mermaid_syntax, output_path, timeout)
+
+    def schedule_render(self, mermaid_syntax: str, output_path: Path) -> str:
+        """Render through the scheduler (concurrency limit, timeout, retries) from a worker thread."""
+        if self._cancelled.is_set():
+            raise RenderError("Render cancelled")
+
+        label = self._display_path(output_path)
+        if self._loop is None:
+            return asyncio.run(self.scheduler.render(label, mermaid_syntax, output_path))
+
+        future = asyncio.run_coroutine_threadsafe(self.scheduler.render(label, mermaid_syntax, output_path),
+                                                  self._loop)
+        with self._renderer_lock:
+            self._scheduled.add(future)
         try:
-            # Create temporary file for mermaid syntax
-            temp_file = output_path.with_suffix('.mmd')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(mermaid_syntax)
+            return future.result()
+        except CancelledError:
+            raise RenderError("Render cancelled")
+        finally:
+            with self._renderer_lock:
+                self._scheduled.discard(future)
+
+    def run_workers(self, function: Callable[[Any], Any], items: List[Any]):
+        """Call function on every item from `jobs` worker threads while the scheduler's event loop runs."""
+        if items:
+            asyncio.run(self._run_workers(function, items))
+
+    async def _run_workers(self, function: Callable[[Any], Any], items: List[Any]):
+        """Feed items to workers through a bounded queue; see run_workers.
+
+        Workers run function in their own threads, so their renders wait on
+        the scheduler without holding up the event loop. When the run is
+        cancelled (Ctrl-C) renders in flight are killed before returning.
+        """
+        self._loop = asyncio.get_running_loop()
+        work = asyncio.Queue(maxsize=self.jobs * 2)
+        executor = ThreadPoolExecutor(max_workers=self.jobs)
+
+        async def feed():
+            for item in items:
+                await work.put(item)
+            for _ in range(self.jobs):
+                await work.put(None)
+
+        async def worker():
+            while (item := await work.get()) is not None:
+                await self._loop.run_in_executor(executor, function, item)
 
-            # Get command from config manager
-            cmd = self.config.get_mermaid_cli_command(temp_file, output_path)
+        try:
+            await asyncio.gather(feed(), *(worker() for _ in range(self.jobs)))
+        except asyncio.CancelledError:
+            self.cancel_renders()
+            raise
+        finally:
+            # Workers may still be finishing a post; wait without blocking the loop
+            await asyncio.to_thread(executor.shutdown, True)
+            self._loop = None
+
+    def cancel_renders(self):
+        """Stop scheduling renders, kill renders in flight and remove their temporary files."""
+        self._cancelled.set()
+        with self._renderer_lock:
+            renderer, self.renderer = self.renderer, None
+            scheduled = list(self._scheduled)
+
+        for future in scheduled:
+            future.cancel()
+        if renderer is not None:
+            renderer.close()
+
+    def get_post_processors(self) -> List[tuple]:
+        """Get the enabled post-processing stages as (label, function) pairs."""
+        post_processors = []
+        if self.output_options['subset_fonts']:
+            post_processors.append(("Font subsetting", font_subsetter.subset_svg_fonts))
+        if self.output_options['optimize']:
+            post_processors.append(("SVG optimization", svg_optimizer.optimize_svg))
+        return post_processors
+
+    def post_process(self, svg: str, output_path: Path) -> str:
+        """Run the enabled post-processing stages over a rendered SVG, recording size changes."""
+        for label, post_processor in self.get_post_processors():
+            before = len(svg.encode('utf-8'))
+            svg = post_processor(svg)
+            after = len(svg.encode('utf-8'))
+
+            self.stats.record_size_change(label, output_path, before, after)
+            self.logger.success(f"{label}: {output_path.name} {format_bytes(before)} → {format_bytes(after)} "
+                                f"(saved {format_bytes(before - after)})")
+
+        return svg
+
+    def write_variants(self, image_path: Path):
+        """Write the enabled variants derived from an up-to-date image."""
+        if self.shared_fonts:
+            self.write_shared_fonts_variant(image_path)
+        for theme, color_map in self.theme_color_maps.items():
+            self.write_theme_variant(image_path, theme, color_map)
+        if self.thumbnails:
+            self.write_thumbnail(image_path)
+        if self.image_manifest is not None:
+            fingerprinted_path = self.image_manifest.add(image_path)
+            self.logger.info(f"  Fingerprinted: {fingerprinted_path}")
+
+    def write_shared_fonts_variant(self, image_path: Path):
+        """Write the shared-font variant of an image unless it is already newer than the image."""
+        variant_path = self.config.get_shared_fonts_image_path(image_path)
+        if variant_path.exists() and variant_path.stat().st_mtime >= image_path.stat().st_mtime:
+            return
+
+        with open(image_path, 'r', encoding='utf-8', newline='') as f:
+            svg = f.read()
+
+        variant = shared_fonts.share_fonts(svg, self.config.shared_fonts_url)
+        variant_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(variant_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(variant)
+
+        before = len(svg.encode('utf-8'))
+        after = len(variant.encode('utf-8'))
+        self.stats.record_size_change("Shared-font variants", variant_path, before, after)
+        self.logger.success(f"Wrote shared-font variant: {variant_path} ({format_bytes(after)})")
+
+    def write_theme_variant(self, image_path: Path, theme: str, color_map: Dict[str, str]):
+        """Write a named theme variant of an image unless it is newer than the image, the theme and the recoloring."""
+        variant_path = self.config.get_theme_variant_image_path(image_path, theme)
+        theme_path = self.config.get_theme_variant_paths()[theme]
+        # Variants written by an earlier version of the recoloring are written again
+        inputs = (image_path, theme_path, Path(theme_variants.__file__))
+        if variant_path.exists() and variant_path.stat().st_mtime >= max(path.stat().st_mtime for path in inputs):
+            return
+
+        with open(image_path, 'r', encoding='utf-8', newline='') as f:
+            svg = f.read()
+
+        # Same layout, other colors: no render needed
+        variant = theme_variants.recolor_svg(svg, color_map)
+        variant_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.write_if_changed(variant_path, variant.encode('utf-8')):
+            self.logger.success(f"Wrote {theme} theme variant: {variant_path}")
+
+    def write_thumbnail(self, image_path: Path):
+        """Write the grid thumbnail of an image unless it is already newer, and list it in the manifest.
+
+        A thumbnail no smaller than the card isn't written; the manifest points at the card instead.
+        """
+        thumbnail_path = self.config.get_thumbnail_image_path(image_path)
+        if thumbnail_path.exists() and thumbnail_path.stat().st_mtime >= image_path.stat().st_mtime:
+            with open(thumbnail_path, 'r', encoding='utf-8', newline='') as f:
+                width, height = thumbnails.get_thumbnail_size(f.read())
+            self.thumbnail_manifest.update(image_path.stem, thumbnail_path, width, height)
+            return
+        if not thumbnail_path.exists() and self.thumbnail_manifest.uses_image(image_path):
+            return
+
+        with open(image_path, 'r', encoding='utf-8', newline='') as f:
+            svg = f.read()
+
+        thumbnail, width, height = thumbnails.make_thumbnail(svg)
+        before = len(svg.encode('utf-8'))
+        after = len(thumbnail.encode('utf-8'))
+        if after >= before:
+            thumbnail_path.unlink(missing_ok=True)
+            self.thumbnail_manifest.update(image_path.stem, image_path, width, height)
+            self.logger.info(f"  Thumbnail would not be smaller than the card, using the card: {image_path}")
+            return
+
+        thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(thumbnail_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(thumbnail)
+        self.thumbnail_manifest.update(image_path.stem, thumbnail_path, width, height)
+
+        self.stats.record_size_change("Grid thumbnails", thumbnail_path, before, after)
+        self.logger.success(f"Wrote thumbnail: {thumbnail_path} ({format_bytes(after)})")
+
+    def save_state(self):
+        """Save the render cache and the enabled manifests (thumbnails, fingerprinted images)."""
+        self.cache.save()
+        if self.thumbnail_manifest is not None:
+            self.thumbnail_manifest.save()
+        if self.image_manifest is not None:
+            self.image_manifest.save()
+
+    def generate_image(self, mermaid_syntax: str, output_path: Path, svg: Optional[str] = None) -> bool:
+        """Generate image from Mermaid syntax using the configured render backend.
+
+        An SVG already rendered elsewhere (by a batch run) is only post-processed and written.
+        """
+        post = self._image_posts.get(output_path, self._display_path(output_path))
+        try:
+            if svg is None:
+                with self.stats.time_stage(post, 'render'):
+                    svg = self.schedule_render(mermaid_syntax, output_path)
 
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            with self.stats.time_stage(post, 'post_process'):
+                # Byte-stable before post-processing, so re-rendering an unchanged card gives the same file
+                svg = svg_normalizer.normalize_svg(svg, svg_normalizer.get_root_id(mermaid_syntax))
+                svg = self.post_process(svg, output_path)
 
-            # Clean up temporary mermaid file
-            temp_file.unlink(missing_ok=True)
+            data = svg.encode('utf-8')
+            with self.stats.time_stage(post, 'write'):
+                changed = self.write_if_changed(output_path, data)
+            self.stats.record_output(post, output_path, len(data))
 
-            if result.returncode == 0:
+            if changed:
                 self.logger.success(f"Generated image: {output_path}")
-                return True
             else:
-                self.logger.error(f"Error generating image: {result.stderr}")
-                return False
+                self.stats.increment_identical()
+                self.logger.success(f"Rendered identical image, left untouched: {output_path}")
+            return True
 
-        except Exception as e:
-            self.logger.error(f"Exception generating image: {e}")
+        except RenderError as e:
+            self.logger.error(f"Error generating image: {e}")
             return False
 
         except Exception as e:
-            self.log(f"✗ Exception generating image: {e}", "ERROR")
+            self.logger.error(f"Exception generating image: {e}")
             return False
 
-    def process_file(self, file_path: Path, force: bool = False) -> bool:
+    def write_if_changed(self, output_path: Path, data: bytes) -> bool:
+        """Write an image unless the file already has exactly this content; returns whether it was written."""
+        try:
+            if output_path.stat().st_size == len(data) and output_path.read_bytes() == data:
+                return False
+        except OSError:
+            pass
+
+        # A new file, so images hardlinked to this one keep their content
+        output_path.unlink(missing_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        return True
+
+    def process_file(self, file_path: Path, force: bool = False, pending: Optional[List[tuple]] = None) -> bool:
         """Process a single markdown file - ONLY generate image, don't modify file."""
+        return self.process_post(self.corpus.load_post(file_path), force, pending)
+
+    def process_post(self, post: PostRecord, force: bool = False, pending: Optional[List[tuple]] = None) -> bool:
+        """Process a loaded post - ONLY generate image, don't modify file.
+
+        With a pending list (batch mode), the render is queued on it as
+        (mermaid_syntax, image_path, cache_key) instead of run; see render_batch.
+        """
+        with self.logger.section():
+            return self._process_post(post, force, pending)
+
+    def _process_post(self, post: PostRecord, force: bool, pending: Optional[List[tuple]] = None) -> bool:
+        """Process a loaded post; see process_post."""
+        file_path = post.path
         self.logger.info(f"\nProcessing: {file_path}")
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if post.error:
+                self.logger.error(post.error)
 
-            front_matter, body = self.extract_front_matter(content)
-
-            if not front_matter.get('mermaid', False):
+            if not post.is_mermaid:
                 self.logger.info(f"  Skipping: Not a mermaid post")
                 self.stats.increment_skipped()
                 return False
 
-            # Generate mermaid syntax using the new generator
-            mermaid_syntax = MermaidDiagramGenerator.generate_from_front_matter(front_matter)
+            # Mermaid syntax derived from the front matter (kept in the post index)
+            mermaid_syntax = post.mermaid_syntax
             if not mermaid_syntax:
                 self.logger.info(f"  Skipping: Could not generate mermaid syntax")
                 self.stats.increment_skipped()
                 return False
 
             # Determine output image path using config manager
-            image_path = self.config.get_image_path(front_matter, file_path)
-
-            # Check if image already exists
-            if image_path.exists() and not force:
-                self.logger.info(f"  Image already exists: {image_path}")
+            image_path = self.config.get_image_path(post.front_matter, file_path)
+            self._image_posts[image_path] = self._display_path(file_path)
+
+            # Skip images rendered from exactly these inputs (syntax, theme, CSS, arguments),
+            # with force only if this run already rendered them
+            cache_key = self.cache.compute_key(mermaid_syntax, self.render_fingerprint)
+            rendered_now = self._run_images.get(cache_key) == image_path
+            if (not force or rendered_now) and self.cache.is_current(image_path, cache_key):
+                self.cache.mark_verified(image_path)
+                self.record_result(image_path, cache_key, 'up_to_date')
+                self.logger.info(f"  Image up to date: {image_path}")
+                self.write_variants(image_path)
                 self.stats.increment_skipped()
                 return False
 
-            # Generate image (no file modification!)
-            if self.generate_image(mermaid_syntax, image_path):
-                self.stats.increment_success()
+            # Identical diagrams rendered earlier in this run (other languages or
+            # posts) are fanned out, even with force
+            run_path = self._run_images.get(cache_key)
+            if run_path and run_path != image_path and self.cache.is_current(run_path, cache_key):
+                with self.stats.time_stage(self._display_path(file_path), 'write'):
+                    self.fan_out(run_path, image_path)
+                self.cache.record(image_path, cache_key)
+                self.record_result(image_path, cache_key, 'deduplicated')
+                self.stats.record_output(self._display_path(file_path), image_path, image_path.stat().st_size)
+                self.logger.success(f"Reused identical diagram of {run_path.name}: {image_path}")
+                self.write_variants(image_path)
+                self.stats.increment_deduplicated()
                 return True
-            else:
-                self.stats.increment_errors()
-                return False
+
+            # Identical diagrams rendered before are copied instead of rendered again
+            cached_path = None if force else self.cache.get(cache_key)
+            if cached_path:
+                with self.stats.time_stage(self._display_path(file_path), 'write'):
+                    if not (image_path.exists() and filecmp.cmp(cached_path, image_path, shallow=False)):
+                        image_path.unlink(missing_ok=True)
+                        shutil.copyfile(cached_path, image_path)
+                self.stats.record_output(self._display_path(file_path), image_path, image_path.stat().st_size)
+                self.cache.record(image_path, cache_key)
+                self.record_result(image_path, cache_key, 'cached')
+                self.logger.success(f"Copied image from cache: {image_path}")
+                self.write_variants(image_path)
+                self.stats.increment_cached()
+                return True
+
+            if pending is not None:
+                pending.append((mermaid_syntax, image_path, cache_key))
+                self.logger.info(f"  Queued for batch render: {image_path}")
+                return True
+
+            # Generate image (no file modification!)
+            return self.finish_image(mermaid_syntax, image_path, cache_key)
 
         except Exception as e:
             self.logger.error(f"Error processing {file_path}: {e}")
             self.stats.increment_errors()
             return False
 
-    def process_files(self, filename_filter: Optional[str] = None, force: bool = False) -> None:
-        """Process all markdown files or those matching the filter."""
+    def finish_image(self, mermaid_syntax: str, image_path: Path, cache_key: str, svg: Optional[str] = None) -> bool:
+        """Write a rendered image, record it in the cache and write its variants."""
+        if self.generate_image(mermaid_syntax, image_path, svg):
+            self.cache.store(cache_key, image_path)
+            self.cache.record(image_path, cache_key)
+            self.record_result(image_path, cache_key, 'rendered')
+            self._run_images.setdefault(cache_key, image_path)
+            self.write_variants(image_path)
+            self.stats.increment_success()
+            return True
+        else:
+            self.record_result(image_path, cache_key, 'failed')
+            self.stats.increment_errors()
+            return False
+
+    def fan_out(self, source_path: Path, image_path: Path):
+        """Give an image the content of an identical one, as a hardlink if enabled, else a copy."""
+        image_path.unlink(missing_ok=True)
+        if self.hardlink_duplicates:
+            try:
+                os.link(source_path, image_path)
+                return
+            except OSError:
+                # Hardlinks unsupported (filesystem, Windows permissions): copy instead
+                pass
+        shutil.copyfile(source_path, image_path)
+
+    def record_result(self, image_path: Path, cache_key: str, status: str):
+        """Record what happened to an image: up_to_date, cached, deduplicated, rendered or failed."""
+        self.image_results[image_path] = {'post': self._image_posts.get(image_path), 'key': cache_key,
+                                          'status': status}
+
+    def render_batch(self, pending: List[tuple]):
+        """Render every queued diagram with one Mermaid CLI run and split the output per image.
+
+        Diagrams the batch did not produce (e.g. after one diagram failed) are
+        rendered one by one with the configured backend.
+        """
+        if not pending:
+            return
+
+        self.logger.info(f"\nRendering {len(pending)} diagrams in a single Mermaid CLI run")
+        # One run renders every diagram, so it gets every diagram's timeout
+        timeout = self.scheduler.timeout and self.scheduler.timeout * len(pending)
+        batch_renderer = MermaidCliRenderer(self.config)
+        try:
+            svgs = batch_renderer.render_batch([syntax for syntax, _, _ in pending], timeout)
+        except RenderError as e:
+            self.logger.warning(f"Batch render failed, rendering diagrams one by one: {e}")
+            svgs = [None] * len(pending)
+        finally:
+            # Kills the run if interrupted
+            batch_renderer.close()
+
+        missing = svgs.count(None)
+        if 0 < missing < len(pending):
+            self.logger.warning(f"{missing} of {len(pending)} diagrams missing from batch output, "
+                                f"rendering them one by one")
+
+        def finish(job: tuple):
+            with self.logger.section():
+                self.finish_image(*job)
+
+        for (mermaid_syntax, image_path, cache_key), svg in zip(pending, svgs):
+            if svg is not None:
+                finish((mermaid_syntax, image_path, cache_key, svg))
+
+        self.run_workers(finish, [job + (None,) for job, svg in zip(pending, svgs) if svg is None])
+
+    def process_files(self, filename_filter: Optional[str] = None, force: bool = False,
+                      changed_since: Optional[str] = None, incremental: bool = False,
+                      batch: bool = False, number: Optional[str] = None, lang: Optional[str] = None,
+                      command: Optional[str] = None, close: bool = True, shard: Optional[tuple] = None,
+                      shard_manifest: Optional[Path] = None) -> None:
+        """Process all markdown files or those matching the filter.
+
+        With changed_since (a git ref) or incremental (modification times), posts
+        that can't be affected are short-circuited before they are read.
+
+        filename_filter is free text matched against the filename and the post's
+        number, language, command, title and descriptors; number, lang and command
+        are exact filters (see post_search.py).
+
+        With batch, every pending diagram is rendered by one Mermaid CLI run.
+        Otherwise posts are independent, so `jobs` workers process them concurrently
+        and render through the scheduler (see render_scheduler.py). The combined
+        CSS is created before any worker starts (in _initialize) and only removed
+        once every worker has finished (in close). Without close, the renderer and
+        combined CSS are kept for later renders (see watch).
+
+        With shard (i, N), only the posts of shard i are processed and a manifest
+        of their images is written to shard_manifest (see sharding.py).
+        """
+        post_paths = []
 
         for posts_dir in self.config.posts_dirs:
             if not posts_dir.exists():
                 continue
 
             self.logger.info(f"\nProcessing directory: {posts_dir}")
-
-            for file_path in posts_dir.glob("*.md"):
-                if filename_filter and filename_filter not in file_path.name:
-                    # Also check in file content for more flexible filtering
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            if filename_filter.lower() not in content.lower():
-                                continue
-                    except:
-                        continue
-
-                self.stats.increment_processed()
-                self.process_file(file_path, force)
-
+            post_paths.extend(sorted(posts_dir.glob("*.md")))
+
+        if changed_since:
+            affected_paths = select_changed_since(self.config, post_paths, changed_since)
+        elif incremental:
+            affected_paths = select_incremental(self.config, post_paths, self.cache)
+        else:
+            affected_paths = post_paths
+        self.stats.increment_unchanged(len(post_paths) - len(affected_paths))
+
+        # Posts come from the post index or are read once, front matter only;
+        # filters are answered by the search index without opening any file
+        loaded = self.corpus.load(affected_paths)
+        for post in loaded:
+            for stage, seconds in post.stage_timings.items():
+                self.stats.record_stage(self._display_path(post.path), stage, seconds)
+
+        posts = PostSearchIndex(loaded).search(filename_filter, number=number, lang=lang, command=command)
+        if shard:
+            selected = sharding.select_shard(posts, *shard)
+            self.logger.info(f"Shard {shard[0]}/{shard[1]}: {len(selected)} of {len(posts)} posts")
+            posts = selected
+
+        for directory, timing in self.corpus.timings.items():
+            self.stats.record_load_timing(self._display_path(directory), **timing)
+
+        self.process_posts(posts, force, batch)
         self.print_summary()
 
+        if shard:
+            manifest_path = shard_manifest or sharding.get_manifest_path(self.config, *shard)
+            sharding.write_manifest(manifest_path, self.config, *shard, self.render_fingerprint, self.image_results)
+            print(f"📁 Shard manifest written to: {manifest_path}")
+
+        if close:
+            self.close()
+
+    def process_posts(self, posts: List[PostRecord], force: bool = False, batch: bool = False):
+        """Render loaded posts, in one batch run or through the scheduler's workers.
+
+        Posts whose diagram is identical to an earlier post's (same Mermaid
+        syntax, e.g. untranslated cards) wait until that one is done and then
+        reuse its image instead of being rendered again.
+        """
+        for _ in posts:
+            self.stats.increment_processed()
+
+        for wave in self.split_duplicates(posts):
+            if batch:
+                pending = []
+                for post in wave:
+                    self.process_post(post, force, pending)
+                self.render_batch(pending)
+            else:
+                self.run_workers(lambda post: self.process_post(post, force), wave)
+
+        for label, report in self.scheduler.reports.items():
+            if report['retries'] or report['timeouts']:
+                self.stats.record_render_attempts(label, report['attempts'], report['retries'], report['timeouts'])
+
+    def split_duplicates(self, posts: List[PostRecord]) -> List[List[PostRecord]]:
+        """Split posts into the first post of each distinct diagram (and non-diagram posts) and the rest."""
+        first, duplicates = [], []
+        seen = set()
+        for post in posts:
+            syntax = post.mermaid_syntax if post.is_mermaid else None
+            key = self.cache.compute_key(syntax, self.render_fingerprint) if syntax else None
+            if key is not None and key in seen:
+                duplicates.append(post)
+            else:
+                first.append(post)
+                seen.add(key)
+        return [first, duplicates]
+
+    def process_coverage(self, batch: bool = False) -> bool:
+        """Render every mermaid post lacking an up-to-date static image and write the coverage data.
+
+        Every post in every language is checked, whatever the filters (see
+        static_coverage.py). Returns whether every card is covered afterwards.
+        """
+        post_paths = [path for posts_dir in self.config.posts_dirs if posts_dir.exists()
+                      for path in sorted(posts_dir.glob('*.md'))]
+        posts = self.corpus.load(post_paths)
+
+        entries = static_coverage.check_coverage(self.config, self.cache, self.render_fingerprint, posts)
+        static_coverage.print_coverage(entries, "Static image coverage before rendering")
+
+        uncovered = set(static_coverage.get_uncovered(entries))
+        if uncovered:
+            print(f"\nRendering {len(uncovered)} cards without an up-to-date static image...")
+            self.process_posts([post for post in posts if self._display_path(post.path) in uncovered],
+                               batch=batch)
+            self.print_summary()
+            entries = static_coverage.check_coverage(self.config, self.cache, self.render_fingerprint, posts)
+            static_coverage.print_coverage(entries, "Static image coverage after rendering")
+
+        static_coverage.write_coverage_data(self.config.coverage_data_path, entries)
+        print(f"📁 Coverage data written to: {self._display_path(self.config.coverage_data_path)}")
+        self.close()
+        return all(entry['status'] == 'current' for entry in entries.values())
+
+    def process_adopt(self) -> int:
+        """Record the current render cache key for every existing image the cache has no entry for.
+
+        Nothing is rendered: the images are trusted as they are, e.g. the committed
+        images of a fresh clone. Images with an entry keep it. Returns how many were adopted.
+        """
+        post_paths = [path for posts_dir in self.config.posts_dirs if posts_dir.exists()
+                      for path in sorted(posts_dir.glob('*.md'))]
+
+        adopted = 0
+        for post in self.corpus.load(post_paths):
+            if not post.is_mermaid or not post.mermaid_syntax:
+                continue
+            image_path = self.config.get_image_path(post.front_matter, post.path)
+            if self.cache.adopt(image_path, self.cache.compute_key(post.mermaid_syntax, self.render_fingerprint)):
+                self.logger.info(f"  Adopted: {image_path}")
+                adopted += 1
+
+        print(f"✓ Adopted {adopted} existing images into the render cache")
+        self.close()
+        return adopted
+
+    def watch(self, filename_filter: Optional[str] = None, number: Optional[str] = None,
+              lang: Optional[str] = None, command: Optional[str] = None, interval: float = 0.2,
+              debounce: float = 0.3):
+        """Re-render the cards of posts as they are saved, until interrupted.
+
+        The renderer, the combined CSS and the post index stay loaded between
+        changes. A change to the theme or the stylesheets rebuilds the combined
+        CSS, restarts the renderer and re-renders every card; otherwise only the
+        changed posts (matching the filters) are loaded and rendered.
+        """
+        watcher = PostWatcher(self.config, interval, debounce)
+        print("\n👀 Watching posts, theme and CSS for changes (Ctrl-C to stop)")
+
+        while True:
+            try:
+                changes = watcher.wait_for_changes()
+            except KeyboardInterrupt:
+                print("\nStopped watching")
+                return
+
+            start = time.perf_counter()
+            if changes.shared:
+                names = ', '.join(sorted(path.name for path in changes.shared))
+                print(f"\n🎨 {names} changed, re-rendering every card")
+                self.config.create_combined_css()
+                self.render_fingerprint = self.config.get_render_fingerprint(self.output_options)
+                with self._renderer_lock:
+                    renderer, self.renderer = self.renderer, None
+                if renderer is not None:
+                    # Restarted on first use with the new theme and CSS
+                    renderer.close()
+                paths = [path for posts_dir in self.config.posts_dirs if posts_dir.exists()
+                         for path in sorted(posts_dir.glob('*.md'))]
+            else:
+                paths = changes.existing_posts
+                if not paths:
+                    continue
+                print(f"\n✏️  Changed: {', '.join(self._display_path(path) for path in paths)}")
+
+            self.stats = StatsTracker()
+            self.scheduler.reports = {}
+            posts = PostSearchIndex(self.corpus.load(paths)).search(
+                filename_filter, number=number, lang=lang, command=command
+            )
+            self.process_posts(posts)
+            self.save_state()
+
+            counts = self.stats.get_stats()
+            print(f"✓ {counts['total_success']} rendered ({counts['total_identical']} identical), "
+                  f"{counts['total_cached']} copied from cache, "
+                  f"{counts['total_skipped']} skipped, {counts['total_errors']} failed "
+                  f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def write_report(self, report_path: Path, options: Optional[dict] = None, scope: str = 'run'):
+        """Write the machine-readable run report (timings, sizes, counts) as JSON.
+
+        scope says what the report covers: the whole run, or with --watch only the
+        most recent round ('last_watch_round'), since every round starts new stats.
+        """
+        self.stats.write_report(report_path, {'backend': self.backend, 'jobs': self.jobs, 'scope': scope,
+                                              'options': options or {}})
+        print(f"📁 Run report written to: {report_path}")
+
     def print_summary(self):
         """Print processing summary."""
         self.stats.print_summary(self.config.images_dir)
 
-        # Clean up temporary files
+    def close(self):
+        """Save the render cache and manifests, shut down the render backend and remove temporary files."""
+        self.save_state()
+
+        if self.renderer is not None:
+            self.renderer.close()
+            self.renderer = None
+
         self.config.cleanup_temp_files()
 
-def check_dependencies():
-    """Check if required dependencies are available."""
-    # Check if mermaid CLI is available
-    try:
-        result = subprocess.run(['npx', '@mermaid-js/mermaid-cli', '--version'],
-                              capture_output=True, text=True)
-        if result.returncode != 0:
-            print("Installing Mermaid CLI...")
+def check_dependencies(config: ConfigManager, refresh: bool = False):
+    """Check that Node.js and Mermaid CLI are available and point the config at them.
+
+    The resolved toolchain is cached (see toolchain.py), so this only spawns
+    processes on the first run or after the toolchain changed.
+    """
+    toolchain = load_toolchain(config.toolchain_state_path, config.root_dir, refresh)
+
+    if toolchain['mmdc'] is None:
+        print("Installing Mermaid CLI...")
+        try:
             subprocess.run(['npm', 'install', '-g', '@mermaid-js/mermaid-cli'], check=True)
-            print("✓ Mermaid CLI installed successfully")
-    except subprocess.CalledProcessError:
-        print("Error: Could not install Mermaid CLI. Please install Node.js and npm first.")
-        sys.exit(1)
-    except FileNotFoundError:
-        print("Error: Node.js/npm not found. Please install Node.js first.")
-        sys.exit(1)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            raise RuntimeError("Could not install Mermaid CLI. Please install Node.js and npm first.")
+        print("✓ Mermaid CLI installed successfully")
+
+        toolchain = load_toolchain(config.toolchain_state_path, config.root_dir, refresh=True)
+        if toolchain['mmdc'] is None:
+            raise RuntimeError("Mermaid CLI was installed but mmdc could not be found")
+
+    config.use_toolchain(toolchain)
 
 def main():
     """Main function."""
     import argparse
 
     parser = argparse.ArgumentParser(description='Generate static images from Jekyll Mermaid posts (non-destructive)')
-    parser.add_argument('filter', nargs='?', help='Filter posts by filename or content')
+    parser.add_argument('filter', nargs='?',
+                        help='Filter posts by filename, or by words of their number, command, title or descriptors')
+    parser.add_argument('--number', help='Only the post with this number (e.g. 053)')
+    parser.add_argument('--lang', choices=['pt', 'en', 'es'], help='Only posts in this language')
+    parser.add_argument('--command', help='Only posts whose command contains these words in order (e.g. "git log")')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
-    parser.add_argument('--force', '-f', action='store_true', help='Regenerate images even if they exist')
+    parser.add_argument('--force', '-f', action='store_true',
+                        help='Regenerate images even if they are up to date, bypassing the render cache')
+    parser.add_argument('--backend', choices=RENDER_BACKENDS, default='auto',
+                        help='Render backend: long-lived renderer pool, one Mermaid CLI process per diagram, '
+                             'auto (pool with CLI fallback) or native (Python layout, no Node/Chromium)')
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument('--changed-since', metavar='GIT_REF',
+                         help='Only load posts changed since a git ref (all posts if theme, CSS or generator code changed)')
+    changes.add_argument('--incremental', action='store_true',
+                         help='Only load posts newer than their image (all posts if theme, CSS or generator code changed)')
+    parser.add_argument('--subset-fonts', action='store_true',
+                        help='Embed only the glyphs each card uses instead of the complete fonts (requires fonttools)')
+    parser.add_argument('--optimize', action='store_true',
+                        help='Optimize SVGs after rendering: strip unused CSS and defs, shorten ids, round coordinates')
+    parser.add_argument('--shared-fonts', action='store_true',
+                        help='Also write variants to assets/img/mermaid/shared-fonts/ that import the shared font '
+                             'stylesheet instead of embedding fonts (self-contained images are kept for social/OG use)')
+    parser.add_argument('--thumbnails', action='store_true',
+                        help='Also write compact grid thumbnails to assets/img/mermaid/thumbnails/ and list them '
+                             'in _data/mermaid_thumbnails.json for the home page (requires fonttools)')
+    parser.add_argument('--themes', metavar='NAME[,NAME...]', type=lambda value: [name for name in value.split(',') if name],
+                        default=[],
+                        help='Also write a variant of each card per named theme (gitfichas-mermaid-theme-NAME.json) '
+                             'to assets/img/mermaid/themes/NAME/, recoloring the rendered card without rendering again')
+    parser.add_argument('--fingerprint', action='store_true',
+                        help='Also write each image as assets/img/mermaid/fingerprinted/<name>.<hash>.svg, list them '
+                             'in _data/mermaid_images.json and prune fingerprints of earlier renders')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Number of posts to render concurrently (default: CPU count)')
+    parser.add_argument('--refresh-toolchain', action='store_true',
+                        help='Re-detect Node.js and Mermaid CLI instead of using the cached probe')
+    parser.add_argument('--batch', action='store_true',
+                        help='Render all pending diagrams with a single Mermaid CLI run, falling back to '
+                             'per-diagram rendering for any the batch did not produce')
+    parser.add_argument('--timeout', type=float, default=60.0, metavar='SECONDS',
+                        help='Kill a render that takes longer than this (default: 60, 0 for no timeout)')
+    parser.add_argument('--hardlink-duplicates', action='store_true',
+                        help='Hardlink images of identical diagrams to the rendered one instead of copying it')
+    parser.add_argument('--shard', metavar='I/N',
+                        help='Only process the cards of shard I of N (e.g. 1/4) and write a shard manifest; '
+                             'combine shards with scripts/sharding.py merge')
+    parser.add_argument('--shard-manifest', metavar='FILE',
+                        help='Where to write the shard manifest (default: .mermaid-cache/shards/shard-I-of-N.json)')
+    parser.add_argument('--watch', action='store_true',
+                        help='After generating, keep running and re-render the cards of posts as they are saved '
+                             '(every card when the theme or CSS changes)')
+    parser.add_argument('--coverage', action='store_true',
+                        help='Check every mermaid post in every language for an up-to-date static image, render '
+                             'those lacking one and write _data/mermaid_coverage.json (exit status 1 if incomplete)')
+    parser.add_argument('--adopt', action='store_true',
+                        help='Record existing images the render cache has no entry for as up to date, without '
+                             'rendering them (e.g. the committed images of a fresh clone)')
+    parser.add_argument('--report', metavar='FILE',
+                        help='Write per-post stage timings, percentiles and output sizes as JSON (e.g. run.json); '
+                             'with --watch, written on exit for the most recent round only')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='Retry a failed or timed out render this many times, with exponential backoff (default: 2)')
 
     args = parser.parse_args()
 
-    check_dependencies()
+    shard = None
+    if args.shard:
+        try:
+            shard = sharding.parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.shard and args.watch:
+        parser.error("--shard can't be combined with --watch")
+    if args.coverage and (args.filter or args.number or args.lang or args.command or args.shard or args.watch
+                          or args.changed_since or args.incremental):
+        parser.error("--coverage checks every post and can't be combined with filters, --shard or --watch")
+    if args.adopt and (args.coverage or args.force or args.filter or args.number or args.lang or args.command
+                       or args.shard or args.watch or args.changed_since or args.incremental):
+        parser.error("--adopt records every existing image and can't be combined with other modes or filters")
+
+    if args.batch and args.backend == 'native':
+        parser.error("--batch renders with Mermaid CLI and can't be combined with --backend native")
 
-    generator = MermaidImageOnlyGenerator(verbose=args.verbose)
+    try:
+        generator = MermaidImageOnlyGenerator(verbose=args.verbose, backend=args.backend, jobs=args.jobs,
+                                              subset_fonts=args.subset_fonts, optimize=args.optimize,
+                                              shared_fonts=args.shared_fonts, timeout=args.timeout or None,
+                                              retries=args.retries, hardlink_duplicates=args.hardlink_duplicates,
+                                              thumbnails=args.thumbnails, fingerprint=args.fingerprint,
+                                              themes=args.themes)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.backend != 'native' and not args.adopt:
+        try:
+            check_dependencies(generator.config, args.refresh_toolchain)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            generator.close()
+            sys.exit(1)
 
     # Process files
-    if args.filter:
-        print(f"Generating images for posts matching: {args.filter}")
+    if args.adopt:
+        generator.process_adopt()
+        return
+
+    if args.coverage:
+        print("Checking static image coverage of all mermaid posts...")
     else:
-        print("Generating images for all mermaid posts...")
+        criteria = [f"filename '{args.filter}'" if args.filter else None,
+                    f"number {args.number}" if args.number else None,
+                    f"lang {args.lang}" if args.lang else None,
+                    f"command '{args.command}'" if args.command else None,
+                    f"changed since {args.changed_since}" if args.changed_since else None,
+                    "changed since their image was verified" if args.incremental else None,
+                    f"shard {shard[0]}/{shard[1]}" if shard else None]
+        criteria = [criterion for criterion in criteria if criterion]
+        if criteria:
+            print(f"Generating images for mermaid posts matching: {', '.join(criteria)}")
+        else:
+            print("Generating images for all mermaid posts...")
+
+    complete = True
+    try:
+        if args.coverage:
+            complete = generator.process_coverage(args.batch)
+        else:
+            generator.process_files(args.filter, args.force, args.changed_since, args.incremental, args.batch,
+                                    args.number, args.lang, args.command, close=not args.watch, shard=shard,
+                                    shard_manifest=Path(args.shard_manifest) if args.shard_manifest else None)
+        if args.watch:
+            generator.watch(args.filter, args.number, args.lang, args.command)
+            generator.close()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        generator.close()
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nInterrupted, cleaning up...")
+        generator.close()
+        sys.exit(130)
+
+    if args.report:
+        generator.write_report(Path(args.report), {key: value for key, value in vars(args).items()
+                                                   if key != 'report'},
+                               'last_watch_round' if args.watch else 'run')
 
-    generator.process_files(args.filter, args.force)
+    if not complete:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
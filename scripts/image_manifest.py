@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Fingerprinted Images for GitFichas Mermaid Generator
+====================================================
+
+Cards are served from /assets/img/mermaid/<number>[-lang].svg, so a re-render
+keeps its URL and can't be given long-lived cache headers. With fingerprinting
+the generator also writes each image as
+assets/img/mermaid/fingerprinted/<number>[-lang].<hash>.svg, named after a
+hash of its content: a new render gets a new URL, so every fingerprinted URL
+can be cached as immutable.
+
+The image manifest (_data/mermaid_images.json) maps each image name ("053",
+"053-en") to its fingerprinted path, hash, size in bytes and intrinsic width
+and height, so Jekyll looks them up instead of building the URL. Fingerprinted
+files no longer listed in the manifest (earlier renders) are pruned when it is
+saved. The unfingerprinted images stay where they are, for social/OG usage and
+as the fallback of the Jekyll include.
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+from thumbnails import get_view_box_size
+
+FINGERPRINT_LENGTH = 10
+
+
+def get_fingerprint(content: bytes) -> str:
+    """Content hash used in fingerprinted filenames."""
+    return hashlib.sha256(content).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+class ImageManifest:
+    """Fingerprinted copy of each card by image name, kept in the Jekyll data directory."""
+
+    def __init__(self, path: Path, root_dir: Path, fingerprinted_dir: Path):
+        self.path = path
+        self.root_dir = root_dir
+        self.fingerprinted_dir = fingerprinted_dir
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the manifest, or start empty if it is missing or unreadable."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def add(self, image_path: Path) -> Path:
+        """Write the fingerprinted copy of an image unless it exists, and list it in the manifest."""
+        content = image_path.read_bytes()
+        fingerprint = get_fingerprint(content)
+        fingerprinted_path = self.fingerprinted_dir / f"{image_path.stem}.{fingerprint}{image_path.suffix}"
+
+        if not fingerprinted_path.exists():
+            self.fingerprinted_dir.mkdir(parents=True, exist_ok=True)
+            # Written under a temporary name so a served URL never has partial content
+            temp_path = fingerprinted_path.with_suffix('.tmp')
+            temp_path.write_bytes(content)
+            temp_path.replace(fingerprinted_path)
+
+        width, height = get_view_box_size(content.decode('utf-8', errors='replace')) or (None, None)
+        entry = {
+            'path': '/' + fingerprinted_path.relative_to(self.root_dir).as_posix(),
+            'hash': fingerprint,
+            'bytes': len(content),
+            'width': round(width) if width else None,
+            'height': round(height) if height else None
+        }
+        with self._lock:
+            if self.entries.get(image_path.stem) != entry:
+                self.entries[image_path.stem] = entry
+                self._dirty = True
+        return fingerprinted_path
+
+    def save(self):
+        """Write the manifest if it changed and prune fingerprinted files it no longer lists."""
+        with self._lock:
+            for name, entry in list(self.entries.items()):
+                if not (self.root_dir / entry.get('path', '').lstrip('/')).is_file():
+                    del self.entries[name]
+                    self._dirty = True
+
+            if self._dirty:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, indent=2, sort_keys=True)
+                    f.write('\n')
+                self._dirty = False
+
+            listed = {self.root_dir / entry['path'].lstrip('/') for entry in self.entries.values()}
+
+        if not self.fingerprinted_dir.exists():
+            return
+        for path in self.fingerprinted_dir.iterdir():
+            if path.is_file() and path not in listed:
+                path.unlink()
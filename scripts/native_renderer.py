@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Native SVG Renderer for GitFichas Mermaid Generator
+===================================================
+
+In-process alternative to the Mermaid/Chromium backends for the fixed card
+templates produced by MermaidDiagramGenerator. It reads the same block-beta
+syntax the generator emits (rows of blocks, `space:n` cells, labelled nodes,
+`-->` arrows and classDef/class styling) and lays it out on a grid the way
+Mermaid does for these cards:
+
+- every row is one block; a row's cells share the column width of the widest
+  node, and rows with a single node span the whole card;
+- every row is as tall as the tallest label in the card plus padding;
+- arrows are vertical, from the command part to its descriptor.
+
+Text is measured with the embedded fonts' advance widths when fontTools is
+installed, and with per-font average widths otherwise. Use
+scripts/compare_backends.py to diff the result against Mermaid's output.
+"""
+
+import base64
+import html
+import io
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config_manager import ConfigManager
+from renderers import RenderError
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:
+    TTFont = None
+
+
+# Part of the render cache key of native output: bump when the layout or markup changes
+NATIVE_RENDERER_VERSION = 2
+
+PADDING = 8
+BASE_FONT_SIZE = 16
+
+# Average advance width in em, used when fontTools is not available
+AVERAGE_CHARACTER_WIDTHS = {
+    'Borel': 0.63,
+    'Chilanka': 0.56,
+}
+DEFAULT_CHARACTER_WIDTH = 0.6
+
+# Chromium's label widths differ from the fonts' advance widths (kerning,
+# hinting); median ratios measured over all cards with compare_backends.py
+ADVANCE_WIDTH_SCALES = {
+    'Borel': 0.93,
+    'Chilanka': 1.095,
+}
+DEFAULT_FONT = {'family': 'Chilanka', 'size': 1.0, 'line_height': 1.4}
+
+ROW_PATTERN = re.compile(r'^block:(\w+)\s*$')
+SPACE_PATTERN = re.compile(r'space(?::(\d+))?')
+# Labels may span several lines (concept cards)
+NODE_PATTERN = re.compile(r'(\w+)(\["|\(")(.*?)(?:"\]|"\))', re.DOTALL)
+ITEM_PATTERN = re.compile(r'space(?::\d+)?|\w+(?:\[".*?"\]|\(".*?"\))', re.DOTALL)
+NODE_ID_PATTERN = re.compile(r'(\w+)(?:\["|\(")')
+EDGE_PATTERN = re.compile(r'^(\w+)\s*-->\s*(\w+)\s*$')
+CLASS_DEF_PATTERN = re.compile(r'^classDef\s+(\w+)\s+(.*?);?\s*$')
+CLASS_PATTERN = re.compile(r'^class\s+([\w,]+)\s+(\w+)\s*$')
+LINE_BREAK_PATTERN = re.compile(r'<br\s*/?>|\\n|\n')
+FONT_FACE_PATTERN = re.compile(
+    r"@font-face\s*\{[^}]*?font-family:\s*'(?P<family>[^']+)'[^}]*?"
+    r"url\(data:font/[\w-]+;base64,(?P<data>[A-Za-z0-9+/=]+)\)",
+    re.DOTALL
+)
+
+
+class Node:
+    """A labelled cell of the diagram."""
+
+    def __init__(self, node_id: str, label: str, rounded: bool):
+        self.id = node_id
+        self.lines = [html.unescape(line.strip()) for line in LINE_BREAK_PATTERN.split(label)]
+        self.rounded = rounded
+        self.classes: List[str] = []
+        self.font = dict(DEFAULT_FONT)
+        self.label_width = 0.0
+        self.label_height = 0.0
+        self.x = 0.0
+        self.y = 0.0
+        self.width = 0.0
+        self.height = 0.0
+
+
+class Row:
+    """A top-level block: a sequence of cells, each a node or empty space."""
+
+    def __init__(self, row_id: str):
+        self.id = row_id
+        self.cells: List[Tuple[int, Optional[Node]]] = []
+        self.classes: List[str] = []
+        self.y = 0.0
+        self.height = 0.0
+
+    @property
+    def span(self) -> int:
+        """Number of grid columns the row's cells occupy."""
+        return sum(columns for columns, _ in self.cells)
+
+    @property
+    def nodes(self) -> List[Node]:
+        """The row's nodes, without spaces."""
+        return [node for _, node in self.cells if node is not None]
+
+
+class Diagram:
+    """Parsed block-beta card."""
+
+    def __init__(self):
+        self.rows: List[Row] = []
+        self.nodes: Dict[str, Node] = {}
+        self.edges: List[Tuple[str, str]] = []
+        self.class_defs: Dict[str, Dict[str, str]] = {}
+        self.width = 0.0
+        self.height = 0.0
+
+
+def parse_diagram(mermaid_syntax: str) -> Diagram:
+    """Parse the block-beta syntax emitted by MermaidDiagramGenerator."""
+    diagram = Diagram()
+    row = None
+    class_assignments = []
+
+    for raw_line in _get_statements(mermaid_syntax):
+        line = raw_line.strip()
+        if not line or line.startswith('%%') or line in ('block-beta',) or line.startswith('columns'):
+            continue
+
+        row_match = ROW_PATTERN.match(line)
+        if row_match:
+            row = Row(row_match.group(1))
+            diagram.rows.append(row)
+            continue
+
+        if line == 'end':
+            row = None
+            continue
+
+        edge_match = EDGE_PATTERN.match(line)
+        if edge_match:
+            diagram.edges.append((edge_match.group(1), edge_match.group(2)))
+            continue
+
+        class_def_match = CLASS_DEF_PATTERN.match(line)
+        if class_def_match:
+            properties = {}
+            for declaration in class_def_match.group(2).split(','):
+                name, _, value = declaration.partition(':')
+                properties[name.strip()] = value.strip().strip("'")
+            diagram.class_defs[class_def_match.group(1)] = properties
+            continue
+
+        class_match = CLASS_PATTERN.match(line)
+        if class_match:
+            class_assignments.append((class_match.group(1).split(','), class_match.group(2)))
+            continue
+
+        if row is None:
+            raise ValueError(f"Unsupported diagram line for the native renderer: {line}")
+
+        for item in ITEM_PATTERN.findall(line):
+            space_match = SPACE_PATTERN.fullmatch(item)
+            if space_match:
+                row.cells.append((int(space_match.group(1) or 1), None))
+                continue
+
+            node_match = NODE_PATTERN.fullmatch(item)
+            node = Node(node_match.group(1), node_match.group(3), node_match.group(2) == '("')
+            diagram.nodes[node.id] = node
+            row.cells.append((1, node))
+
+    rows_by_id = {row.id: row for row in diagram.rows}
+    for targets, class_name in class_assignments:
+        for target in targets:
+            if target in diagram.nodes:
+                diagram.nodes[target].classes.append(class_name)
+            elif target in rows_by_id:
+                rows_by_id[target].classes.append(class_name)
+
+    for node in diagram.nodes.values():
+        for class_name in node.classes:
+            _apply_font_properties(node, diagram.class_defs.get(class_name, {}))
+
+    return diagram
+
+
+def _get_statements(mermaid_syntax: str) -> List[str]:
+    """Lines of the syntax, keeping a quoted label that spans several lines in one statement."""
+    statements = []
+    pending = None
+    for line in mermaid_syntax.splitlines():
+        pending = line if pending is None else pending + '\n' + line
+        if pending.count('"') % 2 == 0:
+            statements.append(pending)
+            pending = None
+    if pending is not None:
+        statements.append(pending)
+    return statements
+
+
+def _apply_font_properties(node: Node, properties: Dict[str, str]):
+    """Apply classDef font properties (family, size and line height in em) to a node."""
+    if 'font-family' in properties:
+        node.font['family'] = properties['font-family']
+    for name, key in (('font-size', 'size'), ('line-height', 'line_height')):
+        value = properties.get(name, '')
+        if value.endswith('em'):
+            node.font[key] = float(value[:-2])
+
+
+class TextMeasurer:
+    """Measures text with the embedded fonts, or with average widths as a fallback."""
+
+    def __init__(self, css: str):
+        self.fonts = {}
+        if TTFont is None:
+            return
+
+        for match in FONT_FACE_PATTERN.finditer(css):
+            font = TTFont(io.BytesIO(base64.b64decode(match.group('data'))))
+            self.fonts[match.group('family')] = (
+                font.getBestCmap(),
+                font['hmtx'].metrics,
+                font['head'].unitsPerEm
+            )
+
+    def width(self, text: str, family: str, font_size: float) -> float:
+        """Width of a single line of text in pixels."""
+        if family not in self.fonts:
+            average = AVERAGE_CHARACTER_WIDTHS.get(family, DEFAULT_CHARACTER_WIDTH)
+            return len(text) * average * font_size
+
+        cmap, metrics, units_per_em = self.fonts[family]
+        advance = 0
+        for char in text:
+            glyph = cmap.get(ord(char))
+            advance += metrics[glyph][0] if glyph in metrics else units_per_em * DEFAULT_CHARACTER_WIDTH
+        return advance * font_size / units_per_em * ADVANCE_WIDTH_SCALES.get(family, 1.0)
+
+
+def get_font_size(node: Node) -> float:
+    """Font size of a node's label in pixels.
+
+    Mermaid nests the label in two elements that both match the classDef's
+    `span` rule, so its em font size applies twice.
+    """
+    return BASE_FONT_SIZE * node.font['size'] ** 2
+
+
+def layout_diagram(diagram: Diagram, measurer: TextMeasurer):
+    """Compute node sizes and positions, centred vertically on y=0 like Mermaid."""
+    for node in diagram.nodes.values():
+        font_size = get_font_size(node)
+        node.label_width = max(measurer.width(line, node.font['family'], font_size) for line in node.lines)
+        node.label_height = len(node.lines) * font_size * node.font['line_height']
+
+    columns = max([row.span for row in diagram.rows if len(row.cells) > 1] or [1])
+
+    # Column width fits the widest node; a full-width node only needs its share of the columns
+    column_width = 0.0
+    for row in diagram.rows:
+        for node in row.nodes:
+            share = columns if len(row.cells) == 1 else 1
+            column_width = max(column_width, (node.label_width + PADDING) / share)
+
+    diagram.width = columns * column_width + (columns + 1) * PADDING
+
+    # Like the columns, every row is as tall as the tallest node in the card
+    node_height = max([node.label_height + PADDING for node in diagram.nodes.values()] or [0])
+
+    for row in diagram.rows:
+        nodes = row.nodes
+        row.height = node_height + 2 * PADDING
+
+        if len(row.cells) == 1 and nodes:
+            node = nodes[0]
+            node.width = diagram.width - 2 * PADDING
+            node.x = diagram.width / 2
+            node.height = node_height
+            continue
+
+        column = 0
+        for span, node in row.cells:
+            if node is not None:
+                node.width = column_width
+                node.height = node_height
+                node.x = PADDING + column * (column_width + PADDING) + column_width / 2
+            column += span
+
+    diagram.height = sum(row.height for row in diagram.rows) + PADDING * (len(diagram.rows) - 1)
+
+    y = -diagram.height / 2
+    for row in diagram.rows:
+        row.y = y + row.height / 2
+        for node in row.nodes:
+            node.y = row.y
+        y += row.height + PADDING
+
+
+def _number(value: float) -> str:
+    """Format a coordinate compactly."""
+    text = f"{value:.3f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def render_svg(diagram: Diagram, theme: Dict[str, str], css: str, background: str) -> str:
+    """Serialize a laid-out diagram as SVG."""
+    text_color = theme.get('primaryTextColor', '#000000')
+    node_fill = theme.get('primaryColor', '#ffffff')
+    node_stroke = theme.get('primaryBorderColor', '#ffffff')
+    line_color = theme.get('lineColor', '#000000')
+
+    width = diagram.width
+    height = diagram.height
+    parts = [
+        f'<svg aria-roledescription="block" role="graphics-document document" '
+        f'viewBox="-5 {_number(-height / 2 - 5)} {_number(width + 10)} {_number(height + 10)}" '
+        f'style="max-width: {_number(width + 10)}px; background-color: {background};" '
+        f'xmlns="http://www.w3.org/2000/svg" width="100%" id="my-svg">',
+        f'<style>{html.escape(css, quote=False)}</style>',
+        f'<marker orient="auto" markerHeight="12" markerWidth="12" markerUnits="userSpaceOnUse" refY="5" refX="6" '
+        f'viewBox="0 0 10 10" class="marker block" id="my-svg_block-pointEnd">'
+        f'<path fill="{line_color}" stroke="{line_color}" class="arrowMarkerPath" d="M 0 0 L 10 5 L 0 10 z"/></marker>',
+        '<g class="block">'
+    ]
+
+    for row in diagram.rows:
+        classes = ' '.join(['node', 'default'] + row.classes)
+        parts.append(
+            f'<g transform="translate({_number(width / 2)}, {_number(row.y)})" id="{row.id}" class="{classes}">'
+            f'<rect height="{_number(row.height)}" width="{_number(width)}" '
+            f'y="{_number(-row.height / 2)}" x="{_number(-width / 2)}" fill="{node_fill}" stroke="{node_stroke}"/></g>'
+        )
+
+        for node in row.nodes:
+            parts.append(_render_node(node, node_fill, node_stroke, text_color))
+
+    for source_id, target_id in diagram.edges:
+        source = diagram.nodes.get(source_id)
+        target = diagram.nodes.get(target_id)
+        if source is None or target is None:
+            continue
+
+        direction = 1 if target.y > source.y else -1
+        start = source.y + direction * source.height / 2
+        end = target.y - direction * target.height / 2
+        parts.append(
+            f'<path marker-end="url(#my-svg_block-pointEnd)" stroke="{line_color}" fill="none" stroke-width="1" '
+            f'id="1-{source_id}-{target_id}" d="M{_number(source.x)},{_number(start)}L{_number(target.x)},{_number(end)}"/>'
+        )
+
+    parts.append('</g></svg>')
+    return ''.join(parts)
+
+
+def _render_node(node: Node, fill: str, stroke: str, text_color: str) -> str:
+    """Serialize one node: its box and centred, possibly multi-line, label."""
+    classes = ' '.join(['node', 'default'] + node.classes)
+    radius = 5 if node.rounded else 0
+    font_size = get_font_size(node)
+    line_height = font_size * node.font['line_height']
+    first_line = -(len(node.lines) - 1) * line_height / 2
+
+    tspans = ''.join(
+        f'<tspan x="0" y="{_number(first_line + index * line_height)}">{html.escape(line)}</tspan>'
+        for index, line in enumerate(node.lines)
+    )
+
+    return (
+        f'<g transform="translate({_number(node.x)}, {_number(node.y)})" id="{node.id}" class="{classes}">'
+        f'<rect height="{_number(node.height)}" width="{_number(node.width)}" y="{_number(-node.height / 2)}" '
+        f'x="{_number(-node.width / 2)}" ry="{radius}" rx="{radius}" fill="{fill}" stroke="{stroke}"/>'
+        f'<text text-anchor="middle" dominant-baseline="central" '
+        f'style="font-family: \'{node.font["family"]}\', cursive; font-size: {_number(font_size)}px; fill: {text_color};">'
+        f'{tspans}</text></g>'
+    )
+
+
+class NativeRenderer:
+    """Renders the fixed card templates to SVG in-process, without Node or a browser."""
+
+    name = 'native'
+
+    def __init__(self, config: ConfigManager):
+        self.config = config
+        self.css = None
+        self.theme = None
+        self.measurer = None
+
+    def start(self):
+        """Load the theme, combined CSS and font metrics once."""
+        options = self.config.get_render_options()
+        self.css = options['css']
+        self.theme = options['mermaidConfig'].get('themeVariables', {})
+        self.measurer = TextMeasurer(self.css)
+
+    def render(self, mermaid_syntax: str, output_path: Optional[Path] = None, timeout: Optional[float] = None) -> str:
+        """Render Mermaid syntax and return the SVG markup; renders are too fast to need the timeout."""
+        if self.measurer is None:
+            self.start()
+
+        try:
+            diagram = parse_diagram(mermaid_syntax)
+        except ValueError as e:
+            raise RenderError(str(e))
+
+        # A node dropped by the parser would silently leave a blank block
+        missing = sorted(set(NODE_ID_PATTERN.findall(mermaid_syntax)) - set(diagram.nodes))
+        if missing:
+            raise RenderError(f"Native renderer could not lay out nodes: {', '.join(missing)}")
+
+        layout_diagram(diagram, self.measurer)
+        background = self.theme.get('background', self.config.background_color)
+        return render_svg(diagram, self.theme, self.css, background)
+
+    def close(self):
+        """Nothing to close."""
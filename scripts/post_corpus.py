@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Post Corpus Loader for GitFichas Mermaid Generator
+==================================================
+
+Loads Jekyll posts into typed records in a single pass:
+
+- each file is read once, line by line, and reading stops at the closing `---`
+  of the front matter (post bodies are never read);
+- YAML is parsed with libyaml's CSafeLoader when PyYAML was built with it;
+- with a PostIndex, unchanged posts come from the index without being read
+  or parsed (see post_index.py);
+- load time, files and bytes read are recorded per posts directory, and the
+  time each post spent being read, parsed and turned into Mermaid syntax is
+  kept on its record.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from config_manager import ConfigManager
+from mermaid_generator import MermaidDiagramGenerator
+from post_index import PostIndex, hash_text
+
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+FRONT_MATTER_DELIMITER = '---'
+
+
+class PostRecord:
+    """Front matter of one post, with the fields the generator uses."""
+
+    def __init__(self, path: Path, lang: str, front_matter: Dict[str, Any], raw_front_matter: str,
+                 error: Optional[str] = None, mermaid_syntax: Optional[str] = None):
+        self.path = path
+        self.lang = lang
+        self.front_matter = front_matter
+        self.raw_front_matter = raw_front_matter
+        self.error = error
+
+        self.number: str = str(front_matter.get('number') or '')
+        self.title: str = str(front_matter.get('title') or '')
+        self.command: str = front_matter.get('command') or ''
+        self.descriptors: List[Dict[str, str]] = front_matter.get('descriptors') or []
+        self.parts: List[Dict[str, str]] = front_matter.get('parts') or []
+        self.info: str = front_matter.get('info') or ''
+        self.translations: List[Dict[str, str]] = front_matter.get('translations') or []
+        self.is_mermaid: bool = bool(front_matter.get('mermaid', False))
+        self.is_concept: bool = bool(front_matter.get('concept', False))
+        self._mermaid_syntax = mermaid_syntax
+        # Seconds spent per load stage: read, parse, syntax
+        self.stage_timings: Dict[str, float] = {}
+
+    @property
+    def mermaid_syntax(self) -> Optional[str]:
+        """Mermaid syntax derived from the front matter, generated on first use."""
+        if self._mermaid_syntax is None and self.is_mermaid:
+            self._mermaid_syntax = MermaidDiagramGenerator.generate_from_front_matter(self.front_matter)
+        return self._mermaid_syntax
+
+
+def read_front_matter(path: Path) -> tuple[str, int]:
+    """Read a post's front matter block, stopping at its closing delimiter.
+
+    Returns the YAML text (empty if the post has none) and the bytes read.
+    """
+    lines = []
+    bytes_read = 0
+
+    with open(path, 'r', encoding='utf-8') as f:
+        first_line = f.readline()
+        bytes_read += len(first_line.encode('utf-8'))
+        if first_line.rstrip() != FRONT_MATTER_DELIMITER:
+            return '', bytes_read
+
+        for line in f:
+            bytes_read += len(line.encode('utf-8'))
+            if line.rstrip() == FRONT_MATTER_DELIMITER:
+                return ''.join(lines), bytes_read
+            lines.append(line)
+
+    # No closing delimiter: not a front matter block
+    return '', bytes_read
+
+
+def parse_front_matter(text: str) -> Dict[str, Any]:
+    """Parse front matter YAML into a dictionary."""
+    front_matter = yaml.load(text, Loader=YAML_LOADER) if text else None
+    return front_matter if isinstance(front_matter, dict) else {}
+
+
+class PostCorpus:
+    """Loads posts into PostRecords and keeps per-directory load statistics."""
+
+    def __init__(self, config: ConfigManager, index: Optional[PostIndex] = None):
+        self.config = config
+        self.index = index
+        self.timings: Dict[Path, Dict[str, float]] = {}
+
+    def get_lang(self, path: Path) -> str:
+        """Language of a post, from the posts directory it is in."""
+        return self.config.posts_dir_langs.get(path.parent, 'pt')
+
+    def load_post(self, path: Path) -> PostRecord:
+        """Load a single post."""
+        record, _, _ = self._load(path)
+        return record
+
+    def _load(self, path: Path) -> tuple[PostRecord, int, bool]:
+        """Load a single post, also returning the bytes read and whether it came from the index."""
+        start = time.perf_counter()
+
+        if self.index is None:
+            text, bytes_read = read_front_matter(path)
+            return self._parse(path, text, start), bytes_read, False
+
+        stat = path.stat()
+        entry = self.index.get(path, stat)
+        if entry:
+            record = self._from_entry(path, entry)
+            record.stage_timings['read'] = time.perf_counter() - start
+            return record, 0, True
+
+        text, bytes_read = read_front_matter(path)
+        digest = hash_text(text)
+        entry = self.index.get_verified(path, stat, digest)
+        if entry:
+            record = self._from_entry(path, entry)
+            record.stage_timings['read'] = time.perf_counter() - start
+            return record, bytes_read, True
+
+        record = self._parse(path, text, start)
+        if not record.error:
+            self.index.put(path, stat, digest, record.front_matter, text, record.mermaid_syntax)
+        return record, bytes_read, False
+
+    def _parse(self, path: Path, text: str, start: float) -> PostRecord:
+        """Build a record by parsing front matter text read since start, timing each stage."""
+        parse_start = time.perf_counter()
+        try:
+            front_matter = parse_front_matter(text)
+            error = None
+        except yaml.YAMLError as e:
+            front_matter = {}
+            error = f"Error parsing YAML: {e}"
+
+        record = PostRecord(path, self.get_lang(path), front_matter, text, error)
+        syntax_start = time.perf_counter()
+        record.mermaid_syntax  # Generated now (rather than on first use) so it is timed
+        end = time.perf_counter()
+
+        record.stage_timings = {'read': parse_start - start, 'parse': syntax_start - parse_start}
+        if record.is_mermaid:
+            record.stage_timings['syntax'] = end - syntax_start
+        return record
+
+    def _from_entry(self, path: Path, entry: Dict[str, Any]) -> PostRecord:
+        """Build a record from an index entry."""
+        return PostRecord(path, self.get_lang(path), entry['front_matter'], entry['raw'],
+                          mermaid_syntax=entry['syntax'])
+
+    def load(self, paths: List[Path]) -> List[PostRecord]:
+        """Load posts in order, recording load time per directory."""
+        records = []
+
+        for path in paths:
+            start = time.perf_counter()
+            record, bytes_read, indexed = self._load(path)
+            elapsed = time.perf_counter() - start
+
+            timing = self.timings.setdefault(path.parent, {'files': 0, 'indexed': 0, 'bytes': 0, 'seconds': 0.0})
+            timing['files'] += 1
+            timing['indexed'] += indexed
+            timing['bytes'] += bytes_read
+            timing['seconds'] += elapsed
+
+            records.append(record)
+
+        if self.index is not None:
+            self.index.save()
+
+        return records
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Post Index for GitFichas Mermaid Generator
+==========================================
+
+Persistent index of parsed front matter, so runs don't re-parse posts that
+haven't changed. Each entry is keyed by the post's path and validated by:
+
+- modification time and size: if both match, the entry is used without
+  opening the file;
+- a hash of the front matter: if the file changed on disk but its front
+  matter didn't (touched, body edited), the entry is reused and its
+  modification time and size are updated.
+
+Entries also hold the Mermaid syntax derived from the front matter. The whole
+index is discarded when mermaid_generator.py changes.
+
+Layout:
+    .mermaid-cache/post-index.json
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def hash_text(text: str) -> str:
+    """Hash front matter text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def get_generator_fingerprint() -> str:
+    """Hash of the code that derives Mermaid syntax from front matter."""
+    generator_path = Path(__file__).parent / 'mermaid_generator.py'
+    return hashlib.sha256(generator_path.read_bytes()).hexdigest()
+
+
+class PostIndex:
+    """On-disk index of parsed front matter and derived Mermaid syntax."""
+
+    INDEX_VERSION = 1
+
+    def __init__(self, index_path: Path, root_dir: Path):
+        self.index_path = index_path
+        self.root_dir = root_dir
+        self.generator_fingerprint = get_generator_fingerprint()
+        self._dirty = False
+        self.posts = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the index, starting fresh if it is missing, corrupt or from other generator code."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if (index.get('version') != self.INDEX_VERSION
+                or index.get('generator') != self.generator_fingerprint):
+            return {}
+
+        return index.get('posts', {})
+
+    def _post_key(self, path: Path) -> str:
+        """Index key for a post: its path relative to the project root."""
+        try:
+            return path.relative_to(self.root_dir).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def get(self, path: Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Get the entry for a post whose modification time and size are unchanged."""
+        entry = self.posts.get(self._post_key(path))
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry
+        return None
+
+    def get_verified(self, path: Path, stat: os.stat_result, digest: str) -> Optional[Dict[str, Any]]:
+        """Get the entry for a post whose file changed but whose front matter hash didn't."""
+        entry = self.posts.get(self._post_key(path))
+        if entry is None or entry['sha256'] != digest:
+            return None
+
+        entry['mtime_ns'] = stat.st_mtime_ns
+        entry['size'] = stat.st_size
+        self._dirty = True
+        return entry
+
+    def put(self, path: Path, stat: os.stat_result, digest: str, front_matter: Dict[str, Any],
+            raw_front_matter: str, mermaid_syntax: Optional[str]):
+        """Index a freshly parsed post.
+
+        Front matter that doesn't survive a JSON round trip (e.g. YAML dates)
+        is not indexed; such posts are simply parsed on every run.
+        """
+        try:
+            if json.loads(json.dumps(front_matter)) != front_matter:
+                return
+        except (TypeError, ValueError):
+            return
+
+        self.posts[self._post_key(path)] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+            'front_matter': front_matter,
+            'raw': raw_front_matter,
+            'syntax': mermaid_syntax
+        }
+        self._dirty = True
+
+    def save(self):
+        """Persist the index if it changed, dropping entries for deleted posts."""
+        for key in [key for key in self.posts if not (self.root_dir / key).exists()]:
+            del self.posts[key]
+            self._dirty = True
+
+        if not self._dirty:
+            return
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.INDEX_VERSION, 'generator': self.generator_fingerprint,
+                       'posts': self.posts}, f, ensure_ascii=False, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Post Search Index for GitFichas Mermaid Generator
+=================================================
+
+Token index over the loaded posts, used to select which posts to process
+without opening any file (records come from the post index):
+
+- structured filters: post number, language and command;
+- free text: matches when it is part of the filename, or when every word of
+  it starts a word of the post's number, language, command, title,
+  descriptors, parts or info.
+"""
+
+import bisect
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from post_corpus import PostRecord
+
+
+TOKEN_PATTERN = re.compile(r'[\w-]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case words, keeping dashes (e.g. '--oneline', '-m')."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def normalize_number(number: str) -> str:
+    """Normalize a post number so '53' and '053' compare equal."""
+    return number.lstrip('0') or '0'
+
+
+class PostSearchIndex:
+    """Inverted index from words to posts, per field and overall."""
+
+    def __init__(self, posts: List[PostRecord]):
+        self.posts = posts
+        self.fields: Dict[str, Dict[str, Set[int]]] = {}
+        self.words: Dict[str, Set[int]] = {}
+
+        for position, post in enumerate(posts):
+            for field, text in self._get_field_texts(post).items():
+                for word in tokenize(text):
+                    self.fields.setdefault(field, {}).setdefault(word, set()).add(position)
+                    self.words.setdefault(word, set()).add(position)
+
+        self.sorted_words = sorted(self.words)
+
+    @staticmethod
+    def _get_field_texts(post: PostRecord) -> Dict[str, str]:
+        """Searchable text of a post, per field."""
+        details = [str(value) for entry in post.descriptors + post.parts if isinstance(entry, dict)
+                   for value in entry.values()]
+        details.append(post.info)
+
+        return {
+            'number': normalize_number(post.number) if post.number else '',
+            'lang': post.lang,
+            'command': post.command,
+            'title': f"{post.front_matter.get('pretitle') or ''} {post.title}",
+            'details': ' '.join(details)
+        }
+
+    def _with_prefix(self, prefix: str) -> Set[int]:
+        """Posts containing a word that starts with the prefix."""
+        matches = set()
+        start = bisect.bisect_left(self.sorted_words, prefix)
+        for word in self.sorted_words[start:]:
+            if not word.startswith(prefix):
+                break
+            matches |= self.words[word]
+        return matches
+
+    def _with_field_words(self, field: str, words: Iterable[str]) -> Set[int]:
+        """Posts whose field contains every given word exactly."""
+        matches = set(range(len(self.posts)))
+        for word in words:
+            matches &= self.fields.get(field, {}).get(word, set())
+        return matches
+
+    def search(self, text: Optional[str] = None, number: Optional[str] = None,
+               lang: Optional[str] = None, command: Optional[str] = None) -> List[PostRecord]:
+        """Posts matching every given filter, in their original order."""
+        matches = set(range(len(self.posts)))
+
+        if number:
+            matches &= self._with_field_words('number', [normalize_number(number)])
+
+        if lang:
+            matches &= self._with_field_words('lang', [lang.lower()])
+
+        if command:
+            # The command's words must appear in order, e.g. 'git log' matches 'git log --oneline'
+            words = tokenize(command)
+            matches = {position for position in matches & self._with_field_words('command', words)
+                       if self._contains_sequence(tokenize(self.posts[position].command), words)}
+
+        if text:
+            text_matches = {position for position, post in enumerate(self.posts) if text in post.path.name}
+            words = tokenize(text)
+            if words:
+                word_matches = set(range(len(self.posts)))
+                for word in words:
+                    word_matches &= self._with_prefix(word)
+                text_matches |= word_matches
+            matches &= text_matches
+
+        return [self.posts[position] for position in sorted(matches)]
+
+    @staticmethod
+    def _contains_sequence(words: List[str], sequence: List[str]) -> bool:
+        """Check whether the words contain the sequence contiguously."""
+        length = len(sequence)
+        return any(words[start:start + length] == sequence for start in range(len(words) - length + 1))
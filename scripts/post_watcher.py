@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Post Watcher for GitFichas Mermaid Generator
+============================================
+
+Polls the post directories, the theme file and the stylesheets for changes
+(standard library only, no platform file-system events):
+
+- every `interval` seconds the modification time and size of each watched
+  file is compared with the previous poll;
+- once something changed, polling continues until nothing has changed for
+  `debounce` seconds, so a burst of saves (editor swap files, a git checkout)
+  is handled as one change.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from config_manager import ConfigManager
+
+
+class WatchChanges:
+    """Posts that were added, modified or deleted, and whether a shared input changed."""
+
+    def __init__(self, posts: Set[Path], shared: Set[Path]):
+        self.posts = posts
+        self.shared = shared
+
+    @property
+    def existing_posts(self) -> List[Path]:
+        """Changed posts that still exist, in path order."""
+        return sorted(path for path in self.posts if path.exists())
+
+
+class PostWatcher:
+    """Detects changes to posts and to the inputs shared by every card."""
+
+    def __init__(self, config: ConfigManager, interval: float = 0.2, debounce: float = 0.3):
+        self.config = config
+        self.interval = interval
+        self.debounce = debounce
+        self.shared_paths = [config.theme_path, config.base_mermaid_css_path, config.embedded_fonts_css_path]
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        """Modification time and size of every watched file."""
+        paths = [path for posts_dir in self.config.posts_dirs if posts_dir.exists()
+                 for path in posts_dir.glob('*.md')]
+        paths.extend(self.shared_paths)
+
+        snapshot = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Deleted between listing and stat
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> Set[Path]:
+        """Files added, modified or deleted since the previous poll."""
+        snapshot = self.take_snapshot()
+        changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changed
+
+    def wait_for_changes(self) -> WatchChanges:
+        """Block until files changed and then stayed quiet for the debounce period."""
+        changed = set()
+        while not changed:
+            time.sleep(self.interval)
+            changed = self.poll()
+
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < self.debounce:
+            time.sleep(self.interval)
+            more = self.poll()
+            if more:
+                changed |= more
+                quiet_since = time.monotonic()
+
+        shared = {path for path in changed if path in self.shared_paths}
+        return WatchChanges(changed - shared, shared)
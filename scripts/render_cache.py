@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Render Cache for GitFichas Mermaid Generator
+============================================
+
+Content-addressed cache of rendered SVGs. Each render is keyed by a hash of the
+Mermaid syntax plus everything else that affects the output (theme file, combined
+CSS and render arguments), so:
+
+- an image is up to date only if the key it was rendered with still matches;
+- identical diagrams are copied from the cache instead of being rendered again.
+
+The manifest isn't committed, so on a fresh clone every image is stale until
+it is rendered (or copied from the cache) once. An image is never assumed up to
+date because it exists; `generate_images_only.py --adopt` records the current
+keys for existing images explicitly, trusting them without a render.
+
+The manifest also records when each image was last verified (written, or
+found up to date), since an up-to-date image is never rewritten and its mtime
+says nothing about when it was last checked (see change_detection.py).
+
+Layout:
+    .mermaid-cache/manifest.json   image path -> key it was last written with,
+                                   and image path -> time it was last verified
+    .mermaid-cache/svg/<key>.svg   rendered SVG for each key
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class RenderCache:
+    """Persistent, content-addressed cache of rendered SVGs."""
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, cache_dir: Path, root_dir: Path):
+        self.cache_dir = cache_dir
+        self.root_dir = root_dir
+        self.manifest_path = cache_dir / 'manifest.json'
+        self.blobs_dir = cache_dir / 'svg'
+        self._lock = threading.Lock()
+        self._dirty = False
+        manifest = self._load_manifest()
+        self.images = manifest.get('images', {})
+        self.verified = manifest.get('verified', {})
+
+    def _load_manifest(self) -> dict:
+        """Load the manifest, starting fresh if it is missing, corrupt or outdated."""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if manifest.get('version') != self.MANIFEST_VERSION:
+            return {}
+
+        return manifest
+
+    @staticmethod
+    def compute_key(mermaid_syntax: str, render_fingerprint: str) -> str:
+        """Compute the cache key for a diagram rendered with the given inputs."""
+        digest = hashlib.sha256()
+        digest.update(render_fingerprint.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(mermaid_syntax.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _image_key(self, image_path: Path) -> str:
+        """Manifest key for an image: its path relative to the project root."""
+        try:
+            return image_path.relative_to(self.root_dir).as_posix()
+        except ValueError:
+            return image_path.as_posix()
+
+    def is_current(self, image_path: Path, key: str) -> bool:
+        """Check whether the image exists and was rendered from exactly these inputs."""
+        return self.get_key(image_path) == key and image_path.exists()
+
+    def get_key(self, image_path: Path) -> Optional[str]:
+        """Key the image was last written with, or None if the manifest has no entry for it."""
+        with self._lock:
+            return self.images.get(self._image_key(image_path))
+
+    def mark_verified(self, image_path: Path):
+        """Record that the image was found up to date just now."""
+        with self._lock:
+            self.verified[self._image_key(image_path)] = time.time()
+            self._dirty = True
+
+    def adopt(self, image_path: Path, key: str) -> bool:
+        """Record an existing image without a manifest entry as rendered from key; returns whether it was."""
+        image_key = self._image_key(image_path)
+        exists = image_path.exists()
+        with self._lock:
+            if image_key in self.images or not exists:
+                return False
+            self.images[image_key] = key
+            self.verified[image_key] = time.time()
+            self._dirty = True
+        return True
+
+    def get_verified_time(self, image_path: Path) -> Optional[float]:
+        """When the image was last written or found up to date, if ever."""
+        with self._lock:
+            return self.verified.get(self._image_key(image_path))
+
+    def get(self, key: str) -> Optional[Path]:
+        """Get the cached SVG for a key, if any."""
+        blob_path = self.blobs_dir / f"{key}.svg"
+        return blob_path if blob_path.exists() else None
+
+    def store(self, key: str, image_path: Path):
+        """Store a freshly rendered image under its key."""
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        blob_path = self.blobs_dir / f"{key}.svg"
+
+        # Write-then-rename so concurrent workers never see a partial file
+        temp_path = blob_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(image_path, temp_path)
+        os.replace(temp_path, blob_path)
+
+    def record(self, image_path: Path, key: str):
+        """Record that the image was written from the given key."""
+        with self._lock:
+            self.images[self._image_key(image_path)] = key
+            self.verified[self._image_key(image_path)] = time.time()
+            self._dirty = True
+
+    def save(self):
+        """Persist the manifest if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = self.manifest_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.MANIFEST_VERSION, 'images': self.images, 'verified': self.verified},
+                          f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.manifest_path)
+            self._dirty = False
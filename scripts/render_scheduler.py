@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Render Scheduler for GitFichas Mermaid Generator
+================================================
+
+Runs renders on an asyncio event loop around a blocking render backend:
+
+- at most `concurrency` renders run at once (a semaphore held per attempt);
+- each attempt is given `timeout` seconds; the backend kills the render
+  process when it expires (a thread blocked on a pipe can't be cancelled) and
+  raises RenderTimeout;
+- failed attempts are retried up to `retries` times, waiting `backoff`
+  seconds before the first retry and twice as long before each next one;
+- attempts, retries and timeouts are reported per card.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from renderers import RenderError, RenderTimeout
+
+
+class RenderScheduler:
+    """Limits, times out and retries renders of a blocking render function."""
+
+    def __init__(self, render: Callable[..., str], concurrency: int = 1, timeout: Optional[float] = None,
+                 retries: int = 0, backoff: float = 1.0):
+        self.render_function = render
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.reports: Dict[str, Dict[str, int]] = {}
+        # Semaphore of the event loop that is running renders (see _get_semaphore)
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore limiting the renders of the running event loop.
+
+        Each asyncio.run (dedup waves, batch fallback, watch rounds) gets a new one,
+        so no primitive outlives its loop; within a loop every render shares it.
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def render(self, label: str, mermaid_syntax: str, output_path: Path) -> str:
+        """Render one diagram, retrying failed attempts, and return the SVG markup.
+
+        Raises the last attempt's RenderError once every retry failed.
+        """
+        semaphore = self._get_semaphore()
+        report = self.reports.setdefault(label, {'attempts': 0, 'retries': 0, 'timeouts': 0})
+
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                report['retries'] += 1
+                # Backoff happens outside the semaphore so other cards keep rendering
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+            report['attempts'] += 1
+            try:
+                async with semaphore:
+                    return await asyncio.to_thread(self.render_function, mermaid_syntax, output_path, self.timeout)
+            except RenderTimeout:
+                report['timeouts'] += 1
+                if attempt == self.retries:
+                    raise
+            except RenderError:
+                if attempt == self.retries:
+                    raise
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Local Render Service for GitFichas
+==================================
+
+A small HTTP service (standard library only) that renders cards on demand,
+for previewing drafts and translations without writing images:
+
+    POST /render   body: front matter as YAML, or JSON {"front_matter": {...}}
+                   or {"path": "_posts/2021-07-19-001.md"}
+    GET  /render?path=_posts/2021-07-19-001.md
+    GET  /stats    cache hits/misses/evictions, size and latency percentiles
+    GET  /health
+
+Renders return the SVG (image/svg+xml) with an X-Cache: hit|miss header.
+The renderer is started once and kept warm. SVGs are kept in an in-memory LRU
+keyed on the Mermaid syntax plus the render fingerprint (theme, combined CSS,
+render arguments), evicting the least recently used SVGs once their total size
+exceeds the limit. Theme and CSS edits are picked up on the next request:
+renders in progress finish on the old renderer before it is replaced.
+
+Errors are answered with a JSON {"error": ...}: 400 for requests that can't be
+rendered (e.g. malformed front matter), 502 when the renderer fails and 500
+for anything else.
+
+Usage:
+    python3 scripts/render_server.py [--port 8765] [--backend auto|pool|cli|native|stub] [--cache-mb 64]
+
+Examples:
+    python3 scripts/render_server.py --backend native
+    curl 'http://127.0.0.1:8765/render?path=_posts/2021-07-19-001.md' -o 001.svg
+    curl --data-binary @draft.yml http://127.0.0.1:8765/render -o draft.svg
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import yaml
+
+from config_manager import ConfigManager
+from mermaid_generator import MermaidDiagramGenerator
+from post_corpus import PostCorpus, parse_front_matter
+from render_cache import RenderCache
+from renderers import RENDER_BACKENDS, RenderError, create_renderer
+from utils import summarize
+
+# Latency samples kept for the stats endpoint
+LATENCY_SAMPLES = 1000
+
+
+class RequestError(Exception):
+    """Raised for requests that can't be rendered; carries the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SvgLruCache:
+    """In-memory LRU of rendered SVGs, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get an SVG and mark it as most recently used."""
+        with self._lock:
+            svg = self.entries.get(key)
+            if svg is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return svg
+
+    def put(self, key: str, svg: bytes):
+        """Add an SVG, evicting the least recently used ones while over the limit.
+
+        An SVG larger than the whole cache is not kept.
+        """
+        if len(svg) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+
+            self.entries[key] = svg
+            self.size += len(svg)
+
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters and current size."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self.entries), 'bytes': self.size, 'max_bytes': self.max_bytes}
+
+
+class RenderService:
+    """Renders front matter or posts to SVG with a warm renderer and an LRU of results."""
+
+    def __init__(self, config: ConfigManager, renderer_factory: Callable[[], Any],
+                 cache_bytes: int = 64 * 1024 * 1024, timeout: Optional[float] = 60.0):
+        self.config = config
+        self.renderer_factory = renderer_factory
+        self.cache = SvgLruCache(cache_bytes)
+        self.timeout = timeout
+        self.corpus = PostCorpus(config)
+        self.renderer = None
+        self.render_fingerprint = None
+        self._input_mtimes = None
+        # Serializes refreshes and close; never taken by a render in progress
+        self._refresh_lock = threading.Lock()
+        self._latency_lock = threading.Lock()
+        # Guards the renderer swap: renders in progress vs. replacing the renderer
+        self._renderer_condition = threading.Condition()
+        self._active_renders = 0
+        self._swapping = False
+        self._latencies: Dict[str, List[float]] = {'request': [], 'render': []}
+
+    def start(self):
+        """Build the combined CSS and start the renderer."""
+        self.config.validate_theme_file()
+        self.config.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._refresh_inputs()
+
+    def _get_input_mtimes(self) -> Tuple[int, ...]:
+        """Modification times of the theme and stylesheets."""
+        return tuple(os.stat(path).st_mtime_ns for path in
+                     (self.config.theme_path, self.config.base_mermaid_css_path,
+                      self.config.embedded_fonts_css_path))
+
+    def _refresh_inputs(self):
+        """Rebuild the combined CSS and restart the renderer if the theme or CSS changed."""
+        with self._refresh_lock:
+            mtimes = self._get_input_mtimes()
+            if mtimes == self._input_mtimes:
+                return
+
+            with self._drain_renders():
+                self.config.create_combined_css()
+                self.render_fingerprint = self.config.get_render_fingerprint()
+                if self.renderer is not None:
+                    self.renderer.close()
+                    self.renderer = None
+                self.renderer = self.renderer_factory()
+                self._input_mtimes = mtimes
+
+    @contextmanager
+    def _drain_renders(self):
+        """Hold off new renders and wait for the ones in progress, e.g. to replace the renderer."""
+        with self._renderer_condition:
+            self._swapping = True
+            self._renderer_condition.wait_for(lambda: self._active_renders == 0)
+        try:
+            yield
+        finally:
+            with self._renderer_condition:
+                self._swapping = False
+                self._renderer_condition.notify_all()
+
+    @contextmanager
+    def _use_renderer(self) -> Iterator[Tuple[Any, str]]:
+        """The current renderer and its render fingerprint, kept until the render is done."""
+        with self._renderer_condition:
+            self._renderer_condition.wait_for(lambda: not self._swapping)
+            if self.renderer is None:
+                raise RequestError(500, "Renderer unavailable")
+            self._active_renders += 1
+            renderer, fingerprint = self.renderer, self.render_fingerprint
+        try:
+            yield renderer, fingerprint
+        finally:
+            with self._renderer_condition:
+                self._active_renders -= 1
+                self._renderer_condition.notify_all()
+
+    def record_latency(self, kind: str, seconds: float):
+        """Keep the most recent latency samples."""
+        with self._latency_lock:
+            samples = self._latencies[kind]
+            samples.append(seconds)
+            del samples[:-LATENCY_SAMPLES]
+
+    def render_syntax(self, mermaid_syntax: str) -> Tuple[bytes, bool]:
+        """Render Mermaid syntax, returning the SVG and whether it came from the cache."""
+        self._refresh_inputs()
+        with self._use_renderer() as (renderer, render_fingerprint):
+            key = RenderCache.compute_key(mermaid_syntax, render_fingerprint)
+
+            svg = self.cache.get(key)
+            if svg is not None:
+                return svg, True
+
+            start = time.perf_counter()
+            try:
+                # Backends write temporary files next to the output path
+                svg = renderer.render(mermaid_syntax, self.config.cache_dir / f"preview-{key[:16]}.svg",
+                                      self.timeout).encode('utf-8')
+            except (RenderError, OSError) as e:
+                raise RequestError(502, f"Render failed: {e}")
+            finally:
+                self.record_latency('render', time.perf_counter() - start)
+
+        self.cache.put(key, svg)
+        return svg, False
+
+    def render_front_matter(self, front_matter: Dict[str, Any]) -> Tuple[bytes, bool]:
+        """Render a card from parsed front matter."""
+        if not isinstance(front_matter, dict):
+            raise RequestError(400, "Front matter must be a mapping")
+
+        try:
+            mermaid_syntax = MermaidDiagramGenerator.generate_from_front_matter(front_matter)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            # Fields of the wrong type, e.g. descriptors: 5
+            raise RequestError(400, f"Invalid front matter: {e}")
+        if not mermaid_syntax:
+            raise RequestError(400, "Could not generate Mermaid syntax from this front matter")
+
+        return self.render_syntax(mermaid_syntax)
+
+    def render_post(self, relative_path: str) -> Tuple[bytes, bool]:
+        """Render a post of this site, given its path relative to the project root."""
+        path = (self.config.root_dir / relative_path).resolve()
+        posts_dirs = [posts_dir.resolve() for posts_dir in self.config.posts_dirs]
+        if path.parent not in posts_dirs or path.suffix != '.md':
+            raise RequestError(400, "Path must be a post in _posts, en/_posts or es/_posts")
+        if not path.is_file():
+            raise RequestError(404, f"Post not found: {relative_path}")
+
+        post = self.corpus.load_post(path)
+        if post.error:
+            raise RequestError(400, post.error)
+        if not post.is_mermaid:
+            raise RequestError(400, "Not a mermaid post")
+
+        return self.render_front_matter(post.front_matter)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters and latency percentiles, in milliseconds."""
+        with self._latency_lock:
+            latencies = {kind: [seconds * 1000 for seconds in samples] for kind, samples in self._latencies.items()}
+        with self._renderer_condition:
+            backend = getattr(self.renderer, 'name', None)
+
+        return {'backend': backend, 'cache': self.cache.get_stats(),
+                'latency_ms': {kind: summarize(samples) for kind, samples in latencies.items()}}
+
+    def close(self):
+        """Shut down the renderer and remove the combined CSS."""
+        with self._refresh_lock, self._drain_renders():
+            if self.renderer is not None:
+                self.renderer.close()
+                self.renderer = None
+        self.config.cleanup_temp_files()
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a RenderService (set as the server's `service` attribute)."""
+
+    server_version = 'GitFichasRender/1.0'
+
+    def do_GET(self):
+        """Serve /render?path=..., /stats and /health."""
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            self._send_json(200, self.server.service.get_stats())
+        elif url.path == '/health':
+            self._send_json(200, {'ok': True})
+        elif url.path == '/render':
+            path = parse_qs(url.query).get('path', [None])[0]
+            if path:
+                self._render(lambda: self.server.service.render_post(path))
+            else:
+                self._send_json(400, {'error': 'Missing ?path='})
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        """Serve /render with front matter (YAML) or JSON {"front_matter": ...} / {"path": ...}."""
+        if urlparse(self.path).path != '/render':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self._send_json(400, {'error': 'Invalid Content-Length'})
+            return
+
+        body = self.rfile.read(length)
+        self._render(lambda: self._render_body(body.decode('utf-8')))
+
+    def _render_body(self, body: str) -> Tuple[bytes, bool]:
+        """Render a POST body."""
+        if 'json' in (self.headers.get('Content-Type') or ''):
+            try:
+                request = json.loads(body)
+            except ValueError as e:
+                raise RequestError(400, f"Invalid JSON: {e}")
+            if isinstance(request, dict) and 'path' in request:
+                return self.server.service.render_post(str(request['path']))
+            if isinstance(request, dict) and 'front_matter' in request:
+                return self.server.service.render_front_matter(request['front_matter'])
+            raise RequestError(400, 'Expected {"front_matter": {...}} or {"path": "..."}')
+
+        # A post's front matter, with or without its --- delimiters
+        text = body.strip()
+        if text.startswith('---'):
+            text = text[3:].split('\n---', 1)[0]
+        try:
+            return self.server.service.render_front_matter(parse_front_matter(text))
+        except yaml.YAMLError as e:
+            raise RequestError(400, f"Invalid YAML: {e}")
+
+    def _render(self, render: Callable[[], Tuple[bytes, bool]]):
+        """Run a render and answer with the SVG or a JSON error."""
+        start = time.perf_counter()
+        try:
+            svg, hit = render()
+        except RequestError as e:
+            self._send_json(e.status, {'error': str(e)})
+            return
+        except UnicodeDecodeError as e:
+            self._send_json(400, {'error': f"Body is not UTF-8: {e}"})
+            return
+        except Exception as e:
+            # Answer rather than drop the connection; the server keeps serving
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            self.server.service.record_latency('request', time.perf_counter() - start)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/svg+xml')
+        self.send_header('Content-Length', str(len(svg)))
+        self.send_header('X-Cache', 'hit' if hit else 'miss')
+        self.end_headers()
+        self.wfile.write(svg)
+
+    def _send_json(self, status: int, data: Dict[str, Any]):
+        """Answer with a JSON document."""
+        body = json.dumps(data, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        """Log requests only when the server is verbose."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(service: RenderService, host: str = '127.0.0.1', port: int = 8765,
+                  verbose: bool = False) -> ThreadingHTTPServer:
+    """Create the HTTP server for a started service; port 0 picks a free port (see server.server_port)."""
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main():
+    """Main function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve on-demand card renders over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--backend', choices=RENDER_BACKENDS + ('stub',), default='auto',
+                        help='Render backend; stub returns placeholder SVGs (for tests)')
+    parser.add_argument('--cache-mb', type=float, default=64,
+                        help='Largest total size of cached SVGs, in MB (default: 64)')
+    parser.add_argument('--timeout', type=float, default=60.0, metavar='SECONDS',
+                        help='Kill a render that takes longer than this (default: 60, 0 for no timeout)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    config = ConfigManager()
+    if args.backend not in ('native', 'stub'):
+        from generate_images_only import check_dependencies
+        try:
+            check_dependencies(config)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    timeout = args.timeout or None
+    service = RenderService(config, lambda: create_renderer(config, args.backend, timeout=timeout),
+                            int(args.cache_mb * 1024 * 1024), timeout)
+    try:
+        service.start()
+        server = create_server(service, args.host, args.port, args.verbose)
+    except (OSError, ValueError, RenderError) as e:
+        print(f"Error: {e}")
+        service.close()
+        sys.exit(1)
+
+    print(f"✓ Serving renders at http://{args.host}:{server.server_port}/render "
+          f"(backend: {service.renderer.name}, Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
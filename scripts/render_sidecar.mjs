@@ -0,0 +1,98 @@
+#!/usr/bin/env node
+/*
+ * GitFichas Mermaid Render Sidecar
+ * ================================
+ *
+ * Long-lived renderer used by scripts/renderers.py. Launches a single headless
+ * browser and renders diagrams one after another, speaking JSON lines over
+ * stdin/stdout:
+ *
+ *   -> {"cmd": "init", "width": 1200, "height": 675, "backgroundColor": "white",
+ *       "mermaidConfig": {...}, "css": "..."}
+ *   <- {"ready": true, "version": "..."}
+ *   -> {"cmd": "render", "id": 1, "definition": "block-beta ..."}
+ *   <- {"id": 1, "ok": true, "svg": "<svg ..."}
+ *
+ * Rendering goes through mermaid-cli's own renderMermaid() so the output matches
+ * `npx @mermaid-js/mermaid-cli` byte for byte.
+ *
+ * The mermaid-cli module is resolved from MERMAID_CLI_MODULE (absolute path to
+ * its src/index.js, set by the Python side from `npm root -g`) or from the
+ * regular node_modules lookup.
+ */
+
+import { createRequire } from 'node:module';
+import { createInterface } from 'node:readline';
+import { pathToFileURL } from 'node:url';
+
+async function loadModules() {
+  const cliModulePath = process.env.MERMAID_CLI_MODULE;
+  if (cliModulePath) {
+    const require = createRequire(cliModulePath);
+    const mermaidCli = await import(pathToFileURL(cliModulePath).href);
+    const puppeteer = await import(pathToFileURL(require.resolve('puppeteer')).href);
+    return { mermaidCli, puppeteer: puppeteer.default ?? puppeteer };
+  }
+
+  const mermaidCli = await import('@mermaid-js/mermaid-cli');
+  const puppeteer = await import('puppeteer');
+  return { mermaidCli, puppeteer: puppeteer.default ?? puppeteer };
+}
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function main() {
+  const { mermaidCli, puppeteer } = await loadModules();
+  let browser = null;
+  let options = null;
+
+  const lines = createInterface({ input: process.stdin, crlfDelay: Infinity });
+
+  for await (const line of lines) {
+    if (!line.trim()) {
+      continue;
+    }
+
+    let request;
+    try {
+      request = JSON.parse(line);
+    } catch (error) {
+      send({ ok: false, error: `Invalid request: ${error.message}` });
+      continue;
+    }
+
+    try {
+      if (request.cmd === 'init') {
+        options = {
+          viewport: { width: request.width, height: request.height, deviceScaleFactor: 1 },
+          backgroundColor: request.backgroundColor,
+          mermaidConfig: request.mermaidConfig,
+          myCSS: request.css,
+        };
+        browser = await puppeteer.launch({ headless: true });
+        send({ ready: true, version: await browser.version() });
+      } else if (request.cmd === 'render') {
+        if (!browser) {
+          throw new Error('Renderer not initialized');
+        }
+        const { data } = await mermaidCli.renderMermaid(browser, request.definition, 'svg', options);
+        send({ id: request.id, ok: true, svg: Buffer.from(data).toString('utf8') });
+      } else {
+        throw new Error(`Unknown command: ${request.cmd}`);
+      }
+    } catch (error) {
+      send({ id: request.id, ok: false, error: error.stack || String(error) });
+    }
+  }
+
+  if (browser) {
+    await browser.close();
+  }
+}
+
+main().catch((error) => {
+  send({ ok: false, error: error.stack || String(error) });
+  process.exit(1);
+});
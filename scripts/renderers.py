@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Render Backends for GitFichas Mermaid Generator
+===============================================
+
+Turns Mermaid syntax into SVG markup. Three backends are available:
+
+- pool: a long-lived Node/Puppeteer sidecar (render_sidecar.mjs) that launches
+  the browser once and renders diagrams one after another over JSON lines.
+- cli:  one Mermaid CLI (mmdc) process per diagram (fallback).
+- native: in-process layout of the fixed card templates (native_renderer.py),
+  no Node or browser required.
+
+StubRenderer writes placeholder SVGs without rendering anything; it exists to
+measure the rest of the pipeline (benchmarks/) on machines without Node and is
+not offered on the command line.
+"""
+
+import html
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config_manager import ConfigManager
+from toolchain import find_mermaid_cli_module
+
+
+RENDER_BACKENDS = ('auto', 'pool', 'cli', 'native')
+
+
+class RenderError(Exception):
+    """Raised when a render backend fails to produce an image."""
+
+
+class RenderTimeout(RenderError):
+    """Raised when a render takes longer than its timeout; the render process is killed."""
+
+
+def _kill_process_group(process: subprocess.Popen):
+    """Kill a process started in its own session, with any browser it launched."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):
+        # No process groups (Windows) or already gone
+        process.kill()
+
+
+class MermaidCliRenderer:
+    """Renders each diagram with a fresh Mermaid CLI process."""
+
+    name = 'cli'
+
+    def __init__(self, config: ConfigManager):
+        self.config = config
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._temp_paths = set()
+
+    def start(self):
+        """Nothing to start: every render spawns its own process."""
+
+    def _run(self, cmd: List[str], timeout: Optional[float]) -> subprocess.CompletedProcess:
+        """Run a Mermaid CLI command, killing it and its browser after timeout seconds."""
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   start_new_session=True)
+        with self._lock:
+            self._processes.add(process)
+
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            process.communicate()
+            raise RenderTimeout(f"Mermaid CLI timed out after {timeout:g}s")
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    def _track(self, *paths: Path):
+        """Remember temporary paths so close() can remove them after an interruption."""
+        with self._lock:
+            self._temp_paths.update(paths)
+
+    def _untrack(self, *paths: Path):
+        """Forget temporary paths that were cleaned up normally."""
+        with self._lock:
+            self._temp_paths.difference_update(paths)
+
+    def render(self, mermaid_syntax: str, output_path: Path, timeout: Optional[float] = None) -> str:
+        """Render Mermaid syntax and return the SVG markup."""
+        temp_file = output_path.with_suffix('.mmd')
+        render_path = output_path.with_suffix('.render.svg')
+        self._track(temp_file, render_path)
+
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(mermaid_syntax)
+
+            cmd = self.config.get_mermaid_cli_command(temp_file, render_path)
+            result = self._run(cmd, timeout)
+
+            if result.returncode != 0:
+                raise RenderError(result.stderr.strip())
+
+            with open(render_path, 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+
+        finally:
+            temp_file.unlink(missing_ok=True)
+            render_path.unlink(missing_ok=True)
+            self._untrack(temp_file, render_path)
+
+    def render_batch(self, mermaid_syntaxes: List[str], timeout: Optional[float] = None) -> List[Optional[str]]:
+        """Render several diagrams with a single Mermaid CLI run.
+
+        The diagrams are written as ```mermaid fences of one markdown file, which
+        mermaid-cli renders in one browser session to batch-1.svg, batch-2.svg, ...
+        A failing diagram makes mermaid-cli exit early, so the returned list has
+        None for every diagram that got no output.
+        """
+        work_dir = Path(tempfile.mkdtemp(prefix='mermaid-batch-'))
+        self._track(work_dir)
+
+        try:
+            input_path = work_dir / 'batch.md'
+            with open(input_path, 'w', encoding='utf-8') as f:
+                for mermaid_syntax in mermaid_syntaxes:
+                    f.write(f"```mermaid\n{mermaid_syntax.strip()}\n```\n\n")
+
+            cmd = self.config.get_mermaid_cli_command(input_path, work_dir / 'batch.svg')
+            try:
+                result = self._run(cmd, timeout)
+            except RenderTimeout as e:
+                # Keep whatever was rendered before the timeout
+                result = subprocess.CompletedProcess(cmd, -1, '', str(e))
+
+            svgs = []
+            for index in range(1, len(mermaid_syntaxes) + 1):
+                render_path = work_dir / f'batch-{index}.svg'
+                if render_path.exists():
+                    with open(render_path, 'r', encoding='utf-8', newline='') as f:
+                        svgs.append(f.read())
+                else:
+                    svgs.append(None)
+
+            if result.returncode != 0 and not any(svgs):
+                raise RenderError(result.stderr.strip())
+
+            return svgs
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self._untrack(work_dir)
+
+    def close(self):
+        """Kill renders still running (after an interruption) and remove their temporary files."""
+        with self._lock:
+            processes = list(self._processes)
+            temp_paths = list(self._temp_paths)
+            self._temp_paths.clear()
+
+        for process in processes:
+            _kill_process_group(process)
+
+        for path in temp_paths:
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+
+class _Sidecar:
+    """A single render_sidecar.mjs process and its JSON-lines channel."""
+
+    def __init__(self, config: ConfigManager, module_path: Optional[Path]):
+        self.config = config
+        self.module_path = module_path
+        self.process = None
+        self._next_id = 0
+        self._stderr_tail = deque(maxlen=20)
+        self._timed_out = False
+
+    def start(self, timeout: Optional[float] = None):
+        """Launch the sidecar and initialize its browser, killing it after timeout seconds."""
+        env = os.environ.copy()
+        if self.module_path:
+            env['MERMAID_CLI_MODULE'] = str(self.module_path)
+
+        self._timed_out = False
+        self.process = subprocess.Popen(
+            ['node', str(self.config.sidecar_script_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            env=env,
+            start_new_session=True
+        )
+        threading.Thread(target=self._drain_stderr, daemon=True).start()
+
+        response = self._request({'cmd': 'init', **self.config.get_render_options()}, timeout)
+        if not response.get('ready'):
+            raise RenderError(f"Renderer failed to start: {response.get('error', 'unknown error')}")
+
+    def is_alive(self) -> bool:
+        """Check whether the sidecar process is still running."""
+        return self.process is not None and self.process.poll() is None
+
+    def render(self, mermaid_syntax: str, timeout: Optional[float] = None) -> str:
+        """Render one diagram and return the SVG markup."""
+        self._next_id += 1
+        response = self._request({'cmd': 'render', 'id': self._next_id, 'definition': mermaid_syntax}, timeout)
+
+        if not response.get('ok'):
+            raise RenderError(response.get('error', 'unknown error'))
+
+        return response['svg']
+
+    def close(self):
+        """Ask the sidecar to exit, killing it if it does not."""
+        if self.process is None:
+            return
+
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            _kill_process_group(self.process)
+            self.process.wait()
+
+        self.process = None
+
+    def _request(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send one request line and read one response line, killing the sidecar after timeout seconds."""
+        try:
+            self.process.stdin.write(json.dumps(message) + '\n')
+            self.process.stdin.flush()
+        except OSError:
+            # The sidecar already exited; its last message (if any) is read below
+            pass
+
+        timer = threading.Timer(timeout, self._kill_on_timeout) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            line = self.process.stdout.readline()
+        finally:
+            if timer:
+                timer.cancel()
+
+        if not line:
+            self.process.wait()
+            if self._timed_out:
+                raise RenderTimeout(f"Renderer timed out after {timeout:g}s")
+            stderr = '\n'.join(self._stderr_tail)
+            raise RenderError(f"Renderer exited with code {self.process.returncode}: {stderr}")
+
+        return json.loads(line)
+
+    def _kill_on_timeout(self):
+        """Kill a sidecar stuck on a request; the pool starts a fresh one."""
+        self._timed_out = True
+        _kill_process_group(self.process)
+
+    def _drain_stderr(self):
+        """Keep the last stderr lines for error messages without blocking the pipe."""
+        for line in self.process.stderr:
+            self._stderr_tail.append(line.rstrip())
+
+
+class MermaidPoolRenderer:
+    """Renders diagrams through a pool of long-lived sidecar processes."""
+
+    name = 'pool'
+
+    def __init__(self, config: ConfigManager, size: int = 1, timeout: Optional[float] = None):
+        self.config = config
+        self.size = max(1, size)
+        # Applies to starting a sidecar as well as to renders
+        self.timeout = timeout
+        self._sidecars = []
+        self._sidecars_lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._closed = False
+        self._module_path = None
+
+    def start(self):
+        """Launch the first sidecar; the others are launched as renders need them (see _acquire)."""
+        # Resolved by the toolchain probe when available; looked up otherwise
+        self._module_path = self.config.mermaid_cli_module or find_mermaid_cli_module()
+
+        sidecar = _Sidecar(self.config, self._module_path)
+        self._sidecars.append(sidecar)
+        sidecar.start(self.timeout)
+        self._idle.put(sidecar)
+
+    def _acquire(self) -> Optional[_Sidecar]:
+        """Take an idle sidecar, launching another one while none is idle and the pool isn't full."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._sidecars_lock:
+            grow = not self._closed and 0 < len(self._sidecars) < self.size
+            if grow:
+                sidecar = _Sidecar(self.config, self._module_path)
+                self._sidecars.append(sidecar)
+
+        if grow:
+            try:
+                sidecar.start(self.timeout)
+                return sidecar
+            except (RenderError, OSError):
+                # The pool keeps its running sidecars; wait for one of them instead
+                sidecar.close()
+                with self._sidecars_lock:
+                    if sidecar in self._sidecars:
+                        self._sidecars.remove(sidecar)
+                    if not self._sidecars:
+                        self._idle.put(None)
+
+        return self._idle.get()
+
+    def render(self, mermaid_syntax: str, output_path: Path, timeout: Optional[float] = None) -> str:
+        """Render Mermaid syntax on the next idle sidecar and return the SVG markup."""
+        sidecar = self._acquire()
+        if sidecar is None:
+            # Every sidecar failed to restart; wake the next waiting render too
+            self._idle.put(None)
+            raise RenderError("No renderer left: every sidecar failed to restart")
+
+        try:
+            return sidecar.render(mermaid_syntax, timeout)
+        finally:
+            self._release(sidecar)
+
+    def _release(self, sidecar: _Sidecar):
+        """Return a sidecar to the pool, restarting it if it crashed and dropping it if that fails."""
+        if not sidecar.is_alive() and not self._closed:
+            # A crashed browser must not take the rest of the run down with it
+            sidecar.close()
+            try:
+                sidecar.start(self.timeout)
+            except (RenderError, OSError):
+                sidecar.close()
+                with self._sidecars_lock:
+                    if sidecar in self._sidecars:
+                        self._sidecars.remove(sidecar)
+                    if not self._sidecars:
+                        self._idle.put(None)
+                return
+        self._idle.put(sidecar)
+
+    def close(self):
+        """Shut down every sidecar in the pool."""
+        self._closed = True
+        with self._sidecars_lock:
+            sidecars, self._sidecars = self._sidecars, []
+        for sidecar in sidecars:
+            sidecar.close()
+
+
+class StubRenderer:
+    """Returns a placeholder SVG listing the diagram's labels, optionally after a fixed delay."""
+
+    name = 'stub'
+
+    LABEL_PATTERN = re.compile(r'\["(.*?)"\]|\("(.*?)"\)')
+
+    def __init__(self, config: ConfigManager, delay: float = 0.0):
+        self.config = config
+        self.delay = delay
+
+    def start(self):
+        """Nothing to start."""
+
+    def render(self, mermaid_syntax: str, output_path: Optional[Path] = None, timeout: Optional[float] = None) -> str:
+        """Return a placeholder SVG with one text element per node label."""
+        if self.delay:
+            threading.Event().wait(self.delay)
+
+        labels = [square or round_ for square, round_ in self.LABEL_PATTERN.findall(mermaid_syntax)]
+        texts = ''.join(f'<text x="10" y="{24 * (index + 1)}">{html.escape(label)}</text>'
+                        for index, label in enumerate(labels))
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {self.config.image_width} '
+                f'{self.config.image_height}">{texts}</svg>')
+
+    def close(self):
+        """Nothing to close."""
+
+
+def create_renderer(config: ConfigManager, backend: str = 'auto', logger=None, size: int = 1,
+                    timeout: Optional[float] = None):
+    """Create and start a render backend, falling back to the CLI when 'auto' can't start the pool.
+
+    timeout bounds starting each pool sidecar (launching its browser), like a render.
+    """
+    if backend == 'cli':
+        return MermaidCliRenderer(config)
+
+    if backend == 'stub':
+        return StubRenderer(config)
+
+    if backend == 'native':
+        # Imported here: native_renderer raises this module's RenderError
+        from native_renderer import NativeRenderer
+        renderer = NativeRenderer(config)
+        renderer.start()
+        return renderer
+
+    renderer = MermaidPoolRenderer(config, size, timeout)
+    try:
+        renderer.start()
+        return renderer
+    except (RenderError, OSError) as e:
+        renderer.close()
+        if backend == 'pool':
+            raise RenderError(f"Could not start the long-lived renderer: {e}")
+
+        if logger:
+            logger.warning(f"Long-lived renderer unavailable, falling back to Mermaid CLI: {e}")
+        return MermaidCliRenderer(config)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Sharded Generation for GitFichas Mermaid Generator
+==================================================
+
+Splits the cards across CI nodes and checks the combined result:
+
+- `--shard i/N` (generate_images_only.py) keeps only the posts whose card
+  hashes to shard i. The hash is of the card's number and language, so a
+  card always lands on the same shard whatever else changed.
+- Each shard writes a manifest: every image it is responsible for, with the
+  post, render cache key, outcome and a hash of the written file.
+- `merge` combines the shard manifests and verifies that every image expected
+  from the posts (ConfigManager.get_image_path of each mermaid post) was
+  produced by exactly one shard, that none failed, and that the files on disk
+  match the hashes the shards recorded.
+
+Usage:
+    python3 scripts/sharding.py merge MANIFEST... [--output FILE]
+
+Examples:
+    python3 scripts/generate_images_only.py --force --shard 1/4   # On each of 4 nodes
+    python3 scripts/sharding.py merge .mermaid-cache/shards/*.json --output merged.json
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config_manager import ConfigManager
+from post_corpus import PostCorpus, PostRecord
+from post_index import PostIndex
+
+MANIFEST_VERSION = 1
+
+# Outcomes that leave a valid image on disk
+PRODUCED_STATUSES = ('rendered', 'cached', 'deduplicated', 'up_to_date')
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Parse 'i/N' (1-based) into (i, N)."""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{text}', expected i/N (e.g. 1/4)")
+
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{text}', i must be between 1 and N")
+    return index, count
+
+
+def get_card_key(post: PostRecord) -> str:
+    """Number and language of a post's card, as they determine its image path."""
+    number = post.front_matter.get('number', post.path.stem.split('-')[-1])
+    lang = post.front_matter.get('lang', 'pt')
+    return f"{number}/{lang}"
+
+
+def get_shard(post: PostRecord, count: int) -> int:
+    """Shard (1-based) a post's card belongs to; stable across runs, machines and Python versions."""
+    digest = hashlib.sha256(get_card_key(post).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(posts: List[PostRecord], index: int, count: int) -> List[PostRecord]:
+    """Posts whose card belongs to shard index of count."""
+    return [post for post in posts if get_shard(post, count) == index]
+
+
+def hash_file(path: Path) -> Optional[str]:
+    """Hash of a file, or None if it doesn't exist."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def get_manifest_path(config: ConfigManager, index: int, count: int) -> Path:
+    """Default manifest path of a shard."""
+    return config.cache_dir / 'shards' / f"shard-{index}-of-{count}.json"
+
+
+def write_manifest(path: Path, config: ConfigManager, index: int, count: int, render_fingerprint: str,
+                   images: Dict[Path, Dict[str, Any]]):
+    """Write a shard's manifest: image path -> post, cache key, status and file hash."""
+    entries = {}
+    for image_path, result in sorted(images.items()):
+        entries[image_path.relative_to(config.root_dir).as_posix()] = {
+            **result,
+            'sha256': hash_file(image_path) if result['status'] in PRODUCED_STATUSES else None
+        }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'shard': index, 'count': count,
+                   'fingerprint': render_fingerprint, 'images': entries}, f, indent=2, sort_keys=True)
+
+
+def get_expected_images(config: ConfigManager) -> Dict[str, List[str]]:
+    """Image every mermaid post should produce -> posts producing it (more than one is a collision)."""
+    paths = [path for posts_dir in config.posts_dirs if posts_dir.exists() for path in sorted(posts_dir.glob('*.md'))]
+    corpus = PostCorpus(config, PostIndex(config.post_index_path, config.root_dir))
+
+    expected = {}
+    for post in corpus.load(paths):
+        if post.is_mermaid and post.mermaid_syntax:
+            image_path = config.get_image_path(post.front_matter, post.path)
+            expected.setdefault(image_path.relative_to(config.root_dir).as_posix(), []).append(
+                post.path.relative_to(config.root_dir).as_posix())
+    return expected
+
+
+def merge_manifests(config: ConfigManager, manifest_paths: List[Path]) -> Dict[str, Any]:
+    """Combine shard manifests and verify every expected image was produced exactly once."""
+    manifests = []
+    for path in manifest_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifests.append(json.load(f))
+
+    problems = []
+    counts = {manifest['count'] for manifest in manifests}
+    fingerprints = {manifest['fingerprint'] for manifest in manifests}
+    if len(counts) > 1:
+        problems.append(f"Manifests come from different shard counts: {sorted(counts)}")
+    if len(fingerprints) > 1:
+        problems.append("Manifests were rendered with different themes, CSS or options")
+
+    shards = sorted(manifest['shard'] for manifest in manifests)
+    for count in counts:
+        missing_shards = sorted(set(range(1, count + 1)) - set(shards))
+        if missing_shards:
+            problems.append(f"Missing shards: {', '.join(str(shard) for shard in missing_shards)} of {count}")
+    duplicate_shards = sorted({shard for shard in shards if shards.count(shard) > 1})
+    if duplicate_shards:
+        problems.append(f"Shards given more than once: {', '.join(str(shard) for shard in duplicate_shards)}")
+
+    images: Dict[str, Dict[str, Any]] = {}
+    produced_by: Dict[str, List[int]] = {}
+    for manifest in manifests:
+        for image, entry in manifest['images'].items():
+            images[image] = {**entry, 'shard': manifest['shard']}
+            produced_by.setdefault(image, []).append(manifest['shard'])
+
+    expected = get_expected_images(config)
+    result = {
+        'expected': len(expected),
+        'produced': sum(1 for entry in images.values() if entry['status'] in PRODUCED_STATUSES),
+        'missing': sorted(set(expected) - set(images)),
+        'unexpected': sorted(set(images) - set(expected)),
+        'duplicated': {image: shards for image, shards in sorted(produced_by.items()) if len(shards) > 1},
+        'collisions': {image: posts for image, posts in sorted(expected.items()) if len(posts) > 1},
+        'failed': sorted(image for image, entry in images.items() if entry['status'] not in PRODUCED_STATUSES),
+        'mismatched': sorted(image for image, entry in images.items()
+                             if entry['status'] in PRODUCED_STATUSES
+                             and hash_file(config.root_dir / image) != entry['sha256']),
+        'problems': problems,
+        'images': images
+    }
+    result['ok'] = not any(result[key] for key in ('missing', 'unexpected', 'duplicated', 'collisions',
+                                                   'failed', 'mismatched', 'problems'))
+    return result
+
+
+def print_merge_result(result: Dict[str, Any]):
+    """Print a merge verification."""
+    for problem in result['problems']:
+        print(f"✗ {problem}")
+
+    checks = [
+        ('missing', "not produced by any shard"),
+        ('unexpected', "produced but not expected from any post"),
+        ('failed', "failed to render"),
+        ('mismatched', "differ from what the shard wrote"),
+    ]
+    for key, description in checks:
+        if result[key]:
+            print(f"✗ {len(result[key])} images {description}: {', '.join(result[key])}")
+
+    for image, shards in result['duplicated'].items():
+        print(f"✗ {image} produced by shards {', '.join(str(shard) for shard in shards)}")
+    for image, posts in result['collisions'].items():
+        print(f"✗ {image} is the image of several posts: {', '.join(posts)}")
+
+    mark = '✅' if result['ok'] else '❌'
+    print(f"\n{mark} {result['produced']}/{result['expected']} expected images produced exactly once")
+
+
+def main():
+    """Main function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Combine and verify sharded image generation')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    merge = subparsers.add_parser('merge', help='Combine shard manifests and verify every image was produced once')
+    merge.add_argument('manifests', nargs='+', help='Shard manifests written with --shard')
+    merge.add_argument('--output', metavar='FILE', help='Write the combined manifest and verification as JSON')
+
+    args = parser.parse_args()
+
+    config = ConfigManager()
+    result = merge_manifests(config, [Path(path) for path in args.manifests])
+    print_merge_result(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, sort_keys=True), encoding='utf-8')
+        print(f"📁 Combined manifest written to: {args.output}")
+
+    sys.exit(0 if result['ok'] else 1)
+
+
+if __name__ == "__main__":
+    main()
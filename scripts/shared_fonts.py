@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Shared Font Variants for GitFichas Mermaid Generator
+====================================================
+
+Self-contained SVGs embed the same base64 fonts in every card, so a reader
+browsing ten cards downloads the fonts ten times. The shared-font variant of a
+card drops its @font-face blocks and imports one site stylesheet instead, which
+the browser downloads once and caches across cards.
+
+External stylesheets are not loaded for SVGs shown through <img>, so the Jekyll
+include embeds shared-font variants with <object>. Rendering itself still uses
+the embedded fonts, so text is measured with the right font either way.
+"""
+
+import re
+
+
+FONT_FACE_BLOCK_PATTERN = re.compile(r'@font-face\s*\{[^}]*\}\s*')
+STYLE_OPEN_PATTERN = re.compile(r'<style[^>]*>')
+
+
+def share_fonts(svg: str, fonts_url: str) -> str:
+    """Replace the embedded @font-face blocks with an @import of the shared font stylesheet."""
+    first_font_face = FONT_FACE_BLOCK_PATTERN.search(svg)
+    if not first_font_face:
+        return svg
+
+    # @import must open its stylesheet: put it right after the <style> holding the fonts
+    style_open = None
+    for match in STYLE_OPEN_PATTERN.finditer(svg, 0, first_font_face.start()):
+        style_open = match
+    if style_open is None:
+        return svg
+
+    svg = FONT_FACE_BLOCK_PATTERN.sub('', svg)
+    return svg[:style_open.end()] + f'@import url("{fonts_url}");' + svg[style_open.end():]
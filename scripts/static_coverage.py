@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Static Image Coverage for GitFichas Mermaid Generator
+=====================================================
+
+Pages only need mermaid.js when one of their cards has no static image and is
+laid out in the browser. Coverage checks every mermaid post, in every
+language, for an up-to-date static image (rendered from the post's current
+syntax with the current theme, CSS and options; see render_cache.py):
+
+- current: the image exists and is up to date;
+- stale: the image exists but was rendered from other inputs;
+- unknown: the image exists but the render cache has no record of its inputs
+  (e.g. a fresh clone), so it can't be trusted;
+- missing: there is no image;
+- unsupported: no Mermaid syntax could be generated from the front matter.
+
+The check only reads the render cache: nothing is adopted or recorded, so an
+image counts as current only when its recorded key matches.
+
+The coverage data (_data/mermaid_coverage.json) lists which images are
+current, so Jekyll can serve them as static images and leave mermaid.js out of
+every page whose cards are all covered.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from config_manager import ConfigManager
+from post_corpus import PostRecord
+from render_cache import RenderCache
+
+COVERAGE_STATUSES = ('current', 'stale', 'unknown', 'missing', 'unsupported')
+
+
+def check_coverage(config: ConfigManager, cache: RenderCache, render_fingerprint: str,
+                   posts: List[PostRecord]) -> Dict[str, Dict[str, Any]]:
+    """Coverage status of each mermaid post's image, by image name ("053", "053-en")."""
+    entries = {}
+    for post in posts:
+        if not post.is_mermaid:
+            continue
+
+        image_path = config.get_image_path(post.front_matter, post.path)
+        syntax = post.mermaid_syntax
+        if not syntax:
+            status = 'unsupported'
+        elif not image_path.exists():
+            status = 'missing'
+        else:
+            recorded = cache.get_key(image_path)
+            if recorded is None:
+                status = 'unknown'
+            elif recorded != cache.compute_key(syntax, render_fingerprint):
+                status = 'stale'
+            else:
+                status = 'current'
+
+        entries[image_path.stem] = {
+            'post': post.path.relative_to(config.root_dir).as_posix(),
+            'lang': post.lang,
+            'status': status
+        }
+    return entries
+
+
+def get_uncovered(entries: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Posts (relative paths) whose image is stale, unknown or missing, and so can be rendered."""
+    return sorted(entry['post'] for entry in entries.values() if entry['status'] in ('stale', 'unknown', 'missing'))
+
+
+def write_coverage_data(path: Path, entries: Dict[str, Dict[str, Any]]):
+    """Write the Jekyll coverage data: whether every card is covered, and which images are current."""
+    images = {name: entry['status'] == 'current' for name, entry in sorted(entries.items())}
+    data = {
+        'complete': all(images.values()),
+        'covered': sum(images.values()),
+        'total': len(images),
+        'images': images
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def print_coverage(entries: Dict[str, Dict[str, Any]], title: str):
+    """Print coverage per language and the cards that aren't covered."""
+    print(f"\n📊 {title}")
+    for lang in ('pt', 'en', 'es'):
+        statuses = [entry['status'] for entry in entries.values() if entry['lang'] == lang]
+        if statuses:
+            print(f"  {lang}: {statuses.count('current')}/{len(statuses)} cards have an up-to-date static image")
+
+    for name, entry in sorted(entries.items()):
+        if entry['status'] != 'current':
+            print(f"  ⚠ {name}: {entry['status']} ({entry['post']})")
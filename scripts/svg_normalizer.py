@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SVG Normalizer for GitFichas Mermaid Generator
+==============================================
+
+Makes rendered SVGs byte-stable, so re-rendering an unchanged card gives the
+same file (and compare-before-write leaves it untouched):
+
+- the root id (mermaid-cli's "my-svg", or a per-render id) and the ids
+  derived from it become an id derived from the card's diagram;
+- ids numbered by a per-page counter (edges such as "7-c-f") are renumbered
+  in order of appearance;
+- comments are dropped;
+- the attributes of every element are sorted by name.
+
+Ids are derived from the Mermaid syntax rather than the post path, so
+identical diagrams (copied from the render cache or fanned out to other
+languages) stay byte-identical. Like the optimizer, the normalized SVG is
+checked against the original and the original is returned if they differ.
+"""
+
+import hashlib
+import re
+from typing import Dict
+
+from svg_optimizer import ID_PATTERN, ID_REFERENCE_PATTERN, SELECTOR_ID_PATTERN, STYLE_PATTERN, is_equivalent
+
+# Part of the render fingerprint: changing the normalization changes every output
+NORMALIZATION_VERSION = 1
+
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+SVG_OPEN_PATTERN = re.compile(r'<svg\b[^>]*>')
+START_TAG_PATTERN = re.compile(r'<([A-Za-z][\w:.-]*)((?:\s+[^\s=/>]+="[^"]*")*)\s*(/?)>')
+ATTRIBUTE_PATTERN = re.compile(r'([^\s=/>]+)="([^"]*)"')
+COUNTER_ID_PATTERN = re.compile(r'(\d+)-(.+)')
+
+
+def get_root_id(mermaid_syntax: str) -> str:
+    """Stable root id of a card, derived from its diagram."""
+    return 'card-' + hashlib.sha256(mermaid_syntax.encode('utf-8')).hexdigest()[:10]
+
+
+def normalize_svg(svg: str, root_id: str) -> str:
+    """Normalize an SVG, returning the original if the result would not render the same."""
+    normalized = COMMENT_PATTERN.sub('', svg)
+    normalized = stabilize_ids(normalized, root_id)
+    normalized = sort_attributes(normalized)
+
+    if not is_equivalent(svg, normalized):
+        return svg
+
+    return normalized
+
+
+def stabilize_ids(svg: str, root_id: str) -> str:
+    """Rename the root id (and ids derived from it) to root_id and renumber counter ids."""
+    ids = ID_PATTERN.findall(svg)
+    renames: Dict[str, str] = {}
+
+    svg_open = SVG_OPEN_PATTERN.search(svg)
+    root_match = ID_PATTERN.search(svg_open.group(0)) if svg_open else None
+    if root_match and root_match.group(1) != root_id:
+        root = root_match.group(1)
+        for element_id in ids:
+            if element_id == root or element_id.startswith((root + '_', root + '-')):
+                renames[element_id] = root_id + element_id[len(root):]
+
+    counters: Dict[str, str] = {}
+    for element_id in ids:
+        match = COUNTER_ID_PATTERN.fullmatch(element_id)
+        if match and element_id not in renames:
+            counter = counters.setdefault(match.group(1), str(len(counters) + 1))
+            renames[element_id] = f"{counter}-{match.group(2)}"
+
+    # Leave everything as is rather than merge two ids
+    kept = set(ids) - set(renames)
+    renamed = list(renames.values())
+    renames = {old: new for old, new in renames.items() if old != new}
+    if not renames or kept & set(renamed) or len(set(renamed)) != len(renamed):
+        return svg
+
+    svg = ID_PATTERN.sub(lambda m: f'id="{renames.get(m.group(1), m.group(1))}"', svg)
+    svg = re.sub(r'url\(#([^)]+)\)', lambda m: f"url(#{renames.get(m.group(1), m.group(1))})", svg)
+    svg = ID_REFERENCE_PATTERN.sub(
+        lambda m: m.group(1) + ' '.join(renames.get(ref, ref) for ref in m.group(2).split(' ')) + '"',
+        svg
+    )
+    # Selectors are renamed in place, keeping the stylesheet's formatting
+    return STYLE_PATTERN.sub(
+        lambda m: m.group(1) + SELECTOR_ID_PATTERN.sub(
+            lambda s: '#' + renames.get(s.group(1), s.group(1)), m.group(2)) + m.group(3),
+        svg
+    )
+
+
+def sort_attributes(svg: str) -> str:
+    """Sort the attributes of every start tag by name."""
+    def replace(match: re.Match) -> str:
+        attributes = sorted(ATTRIBUTE_PATTERN.findall(match.group(2)))
+        rendered = ''.join(f' {name}="{value}"' for name, value in attributes)
+        return f"<{match.group(1)}{rendered}{'/' if match.group(3) else ''}>"
+
+    return START_TAG_PATTERN.sub(replace, svg)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+SVG Optimizer for GitFichas Mermaid Generator
+=============================================
+
+Deterministic, pure-Python clean-up of the SVGs written by Mermaid:
+
+- remove unreferenced <marker> definitions;
+- drop CSS rules whose selectors match nothing in the document and the
+  @keyframes they were the only users of;
+- minify the stylesheets (comments and whitespace);
+- shorten ids and every reference to them;
+- round coordinates to a fixed precision;
+- drop empty style attributes and whitespace between tags.
+
+The optimized SVG is checked against the original (same elements, same text)
+and the original is returned unchanged if they differ.
+"""
+
+import html
+import re
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Set, Tuple
+
+
+STYLE_PATTERN = re.compile(r'(<style[^>]*>)(.*?)(</style>)', re.DOTALL)
+MARKER_PATTERN = re.compile(r'<marker\b[^>]*\bid="(?P<id>[^"]+)"[^>]*>.*?</marker>', re.DOTALL)
+ID_PATTERN = re.compile(r'\bid="([^"]+)"')
+CLASS_PATTERN = re.compile(r'\bclass="([^"]*)"')
+FOREIGN_OBJECT_PATTERN = re.compile(r'<foreignObject\b.*?</foreignObject>', re.DOTALL)
+NUMBER_PATTERN = re.compile(r'-?\d*\.\d+(?:[eE][-+]?\d+)?')
+CSS_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+SELECTOR_CLASS_PATTERN = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+SELECTOR_ID_PATTERN = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+CSS_STRUCTURE_PATTERN = re.compile(r'[{}"\']')
+
+# Attributes holding geometry that can be rounded without visible change
+GEOMETRY_ATTRIBUTES = (
+    'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'width', 'height',
+    'd', 'points', 'transform', 'viewBox', 'refX', 'refY', 'markerWidth', 'markerHeight'
+)
+GEOMETRY_PATTERN = re.compile(r'\b(%s)="([^"]*)"' % '|'.join(GEOMETRY_ATTRIBUTES))
+
+# Attributes whose values refer to ids
+ID_REFERENCE_PATTERN = re.compile(r'\b((?:xlink:)?href="#|aria-(?:labelledby|describedby)=")([^"]*)"')
+
+
+def optimize_svg(svg: str, precision: int = 2) -> str:
+    """Optimize an SVG, returning the original if the result would not render the same."""
+    optimized = remove_unused_markers(svg)
+    optimized = shorten_ids(optimized)
+    optimized = clean_styles(optimized)
+    optimized = round_coordinates(optimized, precision)
+    optimized = collapse_whitespace(optimized)
+
+    if not is_equivalent(svg, optimized):
+        return svg
+
+    return optimized
+
+
+def remove_unused_markers(svg: str) -> str:
+    """Remove <marker> definitions that nothing references."""
+    def replace(match: re.Match) -> str:
+        marker_id = re.escape(match.group('id'))
+        references = re.findall(r'url\(#%s\)|href="#%s"' % (marker_id, marker_id), svg)
+        return match.group(0) if references else ''
+
+    return MARKER_PATTERN.sub(replace, svg)
+
+
+def shorten_ids(svg: str) -> str:
+    """Rename ids longer than two characters to short ones, in order of appearance."""
+    existing = set(ID_PATTERN.findall(svg))
+    renames = {}
+
+    for element_id in ID_PATTERN.findall(svg):
+        if len(element_id) <= 2 or element_id in renames:
+            continue
+
+        candidate = f"_{len(renames)}"
+        while candidate in existing:
+            candidate += '_'
+        renames[element_id] = candidate
+
+    if not renames:
+        return svg
+
+    svg = ID_PATTERN.sub(lambda m: f'id="{renames.get(m.group(1), m.group(1))}"', svg)
+    svg = re.sub(r'url\(#([^)]+)\)', lambda m: f"url(#{renames.get(m.group(1), m.group(1))})", svg)
+    svg = ID_REFERENCE_PATTERN.sub(
+        lambda m: m.group(1) + ' '.join(renames.get(ref, ref) for ref in m.group(2).split(' ')) + '"',
+        svg
+    )
+
+    def rename_selectors(selector: str) -> str:
+        return SELECTOR_ID_PATTERN.sub(lambda m: '#' + renames.get(m.group(1), m.group(1)), selector)
+
+    return STYLE_PATTERN.sub(
+        lambda m: m.group(1) + transform_css(m.group(2), rename_selectors=rename_selectors) + m.group(3),
+        svg
+    )
+
+
+def clean_styles(svg: str) -> str:
+    """Drop unused CSS rules and minify every stylesheet."""
+    document = STYLE_PATTERN.sub('', svg)
+    classes = {name for value in CLASS_PATTERN.findall(document) for name in value.split()}
+    ids = set(ID_PATTERN.findall(document))
+
+    def is_used(selector: str) -> bool:
+        # Attribute selectors can't be checked this way; keep them
+        bare = re.sub(r'\[[^\]]*\]', '', selector)
+        return (all(name in classes for name in SELECTOR_CLASS_PATTERN.findall(bare))
+                and all(name in ids for name in SELECTOR_ID_PATTERN.findall(bare)))
+
+    return STYLE_PATTERN.sub(
+        lambda m: m.group(1) + transform_css(m.group(2), is_used=is_used) + m.group(3),
+        svg
+    )
+
+
+def transform_css(css: str, is_used=None, rename_selectors=None) -> str:
+    """Minify CSS, optionally dropping unused selectors and renaming ids in selectors.
+
+    The CSS comes from an XML text node, so entities (e.g. '&gt;' in child
+    selectors) are decoded before parsing and re-encoded afterwards.
+    """
+    rules = parse_css(CSS_COMMENT_PATTERN.sub('', html.unescape(css)))
+    rules = _transform_rules(rules, is_used, rename_selectors)
+
+    if is_used is not None:
+        # Keep only the animations the remaining rules still use
+        used_text = serialize_css([rule for rule in rules if not _is_keyframes(rule)])
+        rules = [rule for rule in rules
+                 if not _is_keyframes(rule) or re.search(r'\b%s\b' % re.escape(rule[1].split()[-1]), used_text)]
+
+    return html.escape(serialize_css(rules), quote=False)
+
+
+def _is_keyframes(rule: Tuple) -> bool:
+    """Check whether a parsed rule is an @keyframes block."""
+    return rule[0] == 'block' and rule[1].startswith('@') and 'keyframes' in rule[1].split()[0]
+
+
+def _transform_rules(rules: List[Tuple], is_used, rename_selectors) -> List[Tuple]:
+    """Apply selector filtering and renaming to parsed rules, recursing into @media and friends."""
+    result = []
+
+    for rule in rules:
+        kind, prelude, content = rule
+
+        if kind == 'block' and prelude.startswith('@'):
+            if isinstance(content, list):
+                content = _transform_rules(content, is_used, rename_selectors)
+                if not content:
+                    continue
+            result.append((kind, prelude, content))
+            continue
+
+        if kind == 'block':
+            selectors = split_selectors(prelude)
+            if is_used is not None:
+                selectors = [selector for selector in selectors if is_used(selector)]
+                if not selectors:
+                    continue
+            if rename_selectors is not None:
+                selectors = [rename_selectors(selector) for selector in selectors]
+            prelude = ','.join(selectors)
+
+        result.append((kind, prelude, content))
+
+    return result
+
+
+def parse_css(css: str) -> List[Tuple]:
+    """Parse CSS into ('block', prelude, body) and ('statement', text, None) tuples.
+
+    Block at-rules that contain rules (@media, @supports, @keyframes) get a parsed
+    list as body; every other body is kept as a declaration string.
+    """
+    rules = []
+    index = 0
+    length = len(css)
+
+    while index < length:
+        brace = css.find('{', index)
+        semicolon = css.find(';', index)
+
+        if semicolon != -1 and (brace == -1 or semicolon < brace):
+            statement = css[index:semicolon].strip()
+            if statement:
+                rules.append(('statement', statement, None))
+            index = semicolon + 1
+            continue
+
+        if brace == -1:
+            break
+
+        prelude = ' '.join(css[index:brace].split())
+        end = _find_block_end(css, brace)
+        body = css[brace + 1:end]
+
+        at_keyword = prelude.split()[0] if prelude.startswith('@') else ''
+        if at_keyword in ('@media', '@supports', '@document') or 'keyframes' in at_keyword:
+            rules.append(('block', prelude, parse_css(body)))
+        else:
+            rules.append(('block', prelude, minify_declarations(body)))
+
+        index = end + 1
+
+    return rules
+
+
+def _find_block_end(css: str, start: int) -> int:
+    """Find the brace closing the block opened at start."""
+    depth = 0
+    quote: Optional[str] = None
+
+    for match in CSS_STRUCTURE_PATTERN.finditer(css, start):
+        char = match.group(0)
+        index = match.start()
+        if quote:
+            if char == quote and css[index - 1] != '\\':
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return index
+
+    return len(css)
+
+
+def split_selectors(prelude: str) -> List[str]:
+    """Split a selector list on top-level commas."""
+    selectors = []
+    depth = 0
+    current = ''
+
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            selectors.append(current.strip())
+            current = ''
+        else:
+            current += char
+
+    if current.strip():
+        selectors.append(current.strip())
+
+    return selectors
+
+
+def minify_declarations(body: str) -> str:
+    """Collapse whitespace in a declaration block.
+
+    Declarations are not split on ';' because data: URLs contain it.
+    """
+    body = ' '.join(body.split())
+    body = re.sub(r'\s*;\s*', ';', body)
+    body = re.sub(r'^([\w-]+)\s*:\s*|;([\w-]+)\s*:\s*',
+                  lambda m: f"{m.group(1)}:" if m.group(1) else f";{m.group(2)}:", body)
+    return body.strip().rstrip(';')
+
+
+def serialize_css(rules: List[Tuple]) -> str:
+    """Serialize parsed rules back into minified CSS."""
+    output = []
+    for kind, prelude, content in rules:
+        if kind == 'statement':
+            output.append(prelude + ';')
+        elif isinstance(content, list):
+            output.append(prelude + '{' + serialize_css(content) + '}')
+        else:
+            output.append(prelude + '{' + content + '}')
+    return ''.join(output)
+
+
+def round_coordinates(svg: str, precision: int = 2) -> str:
+    """Round decimal numbers in geometry attributes."""
+    def format_number(match: re.Match) -> str:
+        value = round(float(match.group(0)), precision)
+        text = f"{value:.{precision}f}".rstrip('0').rstrip('.')
+        return '0' if text in ('-0', '') else text
+
+    return GEOMETRY_PATTERN.sub(
+        lambda m: f'{m.group(1)}="{NUMBER_PATTERN.sub(format_number, m.group(2))}"',
+        svg
+    )
+
+
+def collapse_whitespace(svg: str) -> str:
+    """Remove empty style attributes and whitespace-only text between SVG tags.
+
+    Whitespace inside <foreignObject> is HTML layout and is left alone.
+    """
+    protected = FOREIGN_OBJECT_PATTERN.findall(svg)
+    placeholder = '\0{}\0'
+    svg = FOREIGN_OBJECT_PATTERN.sub(lambda m, c=iter(range(len(protected))): placeholder.format(next(c)), svg)
+
+    svg = re.sub(r'<!--.*?-->', '', svg, flags=re.DOTALL)
+    svg = re.sub(r'\s+style=""', '', svg)
+    svg = re.sub(r'>\s+<', '><', svg).strip()
+
+    for index, block in enumerate(protected):
+        block = re.sub(r'\s+style=""', '', block)
+        svg = svg.replace(placeholder.format(index), block, 1)
+
+    return svg
+
+
+def is_equivalent(original: str, optimized: str) -> bool:
+    """Check that both SVGs parse and contain the same drawable elements and text."""
+    try:
+        original_root = ET.fromstring(original)
+        optimized_root = ET.fromstring(optimized)
+    except ET.ParseError:
+        return False
+
+    return _signature(original_root) == _signature(optimized_root)
+
+
+def _signature(root: ET.Element) -> List[Tuple[str, str]]:
+    """Tags and text of every element except stylesheets and marker definitions."""
+    signature = []
+    skipped: Set[ET.Element] = set()
+
+    for element in root.iter():
+        tag = element.tag.split('}')[-1]
+        if tag in ('style', 'marker'):
+            skipped.update(element.iter())
+        if element in skipped:
+            continue
+        signature.append((tag, (element.text or '').strip() + '|' + (element.tail or '').strip()))
+
+    return signature
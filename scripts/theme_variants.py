@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Theme Variants for GitFichas Mermaid Generator
+==============================================
+
+Colors don't change a card's layout, so other color themes (e.g. dark) don't
+need a render of their own: a variant is the rendered card with its colors
+replaced, written next to it in assets/img/mermaid/themes/<name>/.
+
+A named theme is a file gitfichas-mermaid-theme-<name>.json next to the base
+theme, whose colorMap maps colors of the base theme to the variant's:
+
+    {"colorMap": {"#ffffff": "#0d1117", "#000000": "#e6edf3"}}
+
+Colors are matched whatever their notation (#fff, #ffffff, white, rgb() and
+rgba(), keeping the alpha) in attributes and stylesheets. Named colors are only
+matched where a color value goes: the value of a color attribute or of a color
+declaration (COLOR_PROPERTIES), never property names or other identifiers such
+as white-space. Text content and embedded fonts are left alone, and every color
+is replaced in one pass, so maps that swap colors work.
+"""
+
+import re
+from typing import Dict, Optional
+
+NAMED_COLORS = {'white': '#ffffff', 'black': '#000000'}
+
+# Attributes and CSS properties whose value is a color
+COLOR_PROPERTIES = ('fill', 'stroke', 'color', 'background', 'background-color', 'stop-color',
+                    'flood-color', 'lighting-color')
+
+STYLE_PATTERN = re.compile(r'(<style[^>]*>)(.*?)(</style>)', re.DOTALL)
+TAG_PATTERN = re.compile(r'<[A-Za-z][^>]*>')
+COLOR_PATTERN_SOURCE = (
+    r'(?P<data>url\(\s*["\']?data:[^)]*\))'
+    r'|(?P<hex>#(?:[0-9a-fA-F]{6}|[0-9a-fA-F]{3})\b)'
+    r'|(?P<rgb>rgba?\(\s*(?P<r>[\d.]+)\s*,\s*(?P<g>[\d.]+)\s*,\s*(?P<b>[\d.]+)\s*(?:,\s*(?P<a>[\d.]+%?)\s*)?\))'
+)
+COLOR_PATTERN = re.compile(COLOR_PATTERN_SOURCE)
+# In color values named colors are colors too
+COLOR_VALUE_PATTERN = re.compile(
+    COLOR_PATTERN_SOURCE + r'|(?<![\w-])(?:' + '|'.join(NAMED_COLORS) + r')(?![\w-])', re.IGNORECASE
+)
+COLOR_PROPERTY_NAMES = '(?:' + '|'.join(re.escape(name) for name in COLOR_PROPERTIES) + ')'
+# Color values in a stylesheet (declarations) and in a start tag (attributes, declarations in style)
+CSS_COLOR_VALUE_PATTERN = re.compile(r'(?<![\w-])' + COLOR_PROPERTY_NAMES + r'\s*:(?P<value>[^;{}"]*)', re.IGNORECASE)
+TAG_COLOR_VALUE_PATTERN = re.compile(
+    r'(?:\s' + COLOR_PROPERTY_NAMES + r'="|(?<![\w-])' + COLOR_PROPERTY_NAMES + r'\s*:)(?P<value>[^;"]*)',
+    re.IGNORECASE
+)
+
+
+def normalize_color(color: str) -> Optional[str]:
+    """Lowercase #rrggbb form of a hex or named color, or None if it isn't one."""
+    color = color.strip().lower()
+    color = NAMED_COLORS.get(color, color)
+    if re.fullmatch(r'#[0-9a-f]{3}', color):
+        return '#' + ''.join(digit * 2 for digit in color[1:])
+    if re.fullmatch(r'#[0-9a-f]{6}', color):
+        return color
+    return None
+
+
+def parse_color_map(color_map: Dict[str, str]) -> Dict[str, str]:
+    """Color map keyed by normalized color, with values validated; raises ValueError."""
+    parsed = {}
+    for source, target in color_map.items():
+        normalized_source = normalize_color(source)
+        normalized_target = normalize_color(target)
+        if normalized_source is None or normalized_target is None:
+            raise ValueError(f"Invalid color mapping '{source}' -> '{target}', expected hex or named colors")
+        parsed[normalized_source] = normalized_target
+    return parsed
+
+
+def _recolor(text: str, color_map: Dict[str, str], pattern: re.Pattern = COLOR_PATTERN) -> str:
+    """Replace every mapped color matched by pattern in a piece of markup or CSS, leaving data URIs alone."""
+    def replace(match: re.Match) -> str:
+        if match.group('data'):
+            return match.group(0)
+
+        if match.group('rgb'):
+            channels = [min(255, round(float(match.group(key)))) for key in ('r', 'g', 'b')]
+            target = color_map.get('#' + ''.join(f"{channel:02x}" for channel in channels))
+            if target is None:
+                return match.group(0)
+            red, green, blue = (int(target[i:i + 2], 16) for i in (1, 3, 5))
+            if match.group('a') is not None:
+                return f"rgba({red}, {green}, {blue}, {match.group('a')})"
+            return f"rgb({red}, {green}, {blue})"
+
+        return color_map.get(normalize_color(match.group(0)), match.group(0))
+
+    return pattern.sub(replace, text)
+
+
+def _recolor_values(text: str, color_map: Dict[str, str], value_pattern: re.Pattern) -> str:
+    """Replace the mapped colors, named ones only in the color values matched by value_pattern."""
+    parts = []
+    position = 0
+    for match in value_pattern.finditer(text):
+        parts.append(_recolor(text[position:match.start('value')], color_map))
+        parts.append(_recolor(match.group('value'), color_map, COLOR_VALUE_PATTERN))
+        position = match.end('value')
+    parts.append(_recolor(text[position:], color_map))
+    return ''.join(parts)
+
+
+def recolor_svg(svg: str, color_map: Dict[str, str]) -> str:
+    """Replace the mapped colors in the attributes and stylesheets of an SVG."""
+    svg = STYLE_PATTERN.sub(
+        lambda m: m.group(1) + _recolor_values(m.group(2), color_map, CSS_COLOR_VALUE_PATTERN) + m.group(3), svg)
+    return TAG_PATTERN.sub(lambda m: _recolor_values(m.group(0), color_map, TAG_COLOR_VALUE_PATTERN), svg)
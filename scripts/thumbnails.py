@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Grid Thumbnails for GitFichas Mermaid Generator
+===============================================
+
+The home page shows every card in a grid, and inlining each card's full,
+font-embedded SVG makes the home page download every card in full. A thumbnail
+is a compact variant of the card for the grid:
+
+- fonts are subset to the glyphs the card uses and the SVG is optimized
+  (see font_subsetter.py and svg_optimizer.py);
+- the root element gets an explicit width and height (THUMBNAIL_WIDTH wide,
+  keeping the aspect ratio of the viewBox) instead of width="100%".
+
+A card already written with --subset-fonts --optimize can't get any smaller
+this way, so when the thumbnail would be no smaller than the card it isn't
+written and the manifest points at the card itself, still with the thumbnail's
+display size.
+
+The thumbnail manifest (_data/mermaid_thumbnails.json) lists the src, width,
+height and size of each thumbnail by image name ("053", "053-en"), so the
+home layout can show it as a lazy-loaded <img> with its intrinsic size and
+leave the full card to the post page.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import font_subsetter
+import svg_optimizer
+
+THUMBNAIL_WIDTH = 600
+
+SVG_OPEN_PATTERN = re.compile(r'<svg\b[^>]*>')
+VIEW_BOX_PATTERN = re.compile(r'\bviewBox="([^"]*)"')
+SIZE_ATTRIBUTE_PATTERN = re.compile(r'\s(?:width|height)="[^"]*"')
+
+
+def get_view_box_size(svg: str) -> Optional[Tuple[float, float]]:
+    """Width and height of the root viewBox, or None if it has none."""
+    svg_open = SVG_OPEN_PATTERN.search(svg)
+    view_box = VIEW_BOX_PATTERN.search(svg_open.group(0)) if svg_open else None
+    if not view_box:
+        return None
+
+    try:
+        _, _, width, height = (float(value) for value in view_box.group(1).replace(',', ' ').split())
+    except ValueError:
+        return None
+    return (width, height) if width > 0 and height > 0 else None
+
+
+def get_thumbnail_size(svg: str, width: int = THUMBNAIL_WIDTH) -> Tuple[int, int]:
+    """Display size of a card's thumbnail: width wide, with the aspect ratio of its viewBox."""
+    view_box_size = get_view_box_size(svg)
+    if view_box_size is None:
+        return width, width * 9 // 16
+    return width, max(1, round(width * view_box_size[1] / view_box_size[0]))
+
+
+def make_thumbnail(svg: str, width: int = THUMBNAIL_WIDTH) -> Tuple[str, int, int]:
+    """Compact thumbnail of a card, with its display width and height."""
+    thumbnail = svg_optimizer.optimize_svg(font_subsetter.subset_svg_fonts(svg))
+    # Sized from the optimized viewBox, so an existing thumbnail gives the same size (get_thumbnail_size)
+    thumbnail_width, thumbnail_height = get_thumbnail_size(thumbnail, width)
+    svg_open = SVG_OPEN_PATTERN.search(thumbnail)
+    if svg_open:
+        attributes = SIZE_ATTRIBUTE_PATTERN.sub('', svg_open.group(0)[:-1].rstrip('/'))
+        closing = '/>' if svg_open.group(0).endswith('/>') else '>'
+        thumbnail = (thumbnail[:svg_open.start()]
+                     + f'{attributes} width="{thumbnail_width}" height="{thumbnail_height}"{closing}'
+                     + thumbnail[svg_open.end():])
+    return thumbnail, thumbnail_width, thumbnail_height
+
+
+class ThumbnailManifest:
+    """Thumbnail of each card by image name, kept in the Jekyll data directory."""
+
+    def __init__(self, path: Path, root_dir: Path):
+        self.path = path
+        self.root_dir = root_dir
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the manifest, or start empty if it is missing or unreadable."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def update(self, name: str, src_path: Path, width: int, height: int):
+        """Record a card's thumbnail: the thumbnail file, or the card itself when that is no larger."""
+        entry = {
+            'src': '/' + src_path.relative_to(self.root_dir).as_posix(),
+            'width': width,
+            'height': height,
+            'bytes': src_path.stat().st_size
+        }
+        if self.entries.get(name) != entry:
+            self.entries[name] = entry
+            self._dirty = True
+
+    def uses_image(self, image_path: Path) -> bool:
+        """Whether the card's entry points at the card itself and was saved since the card was written."""
+        entry = self.entries.get(image_path.stem)
+        src = '/' + image_path.relative_to(self.root_dir).as_posix()
+        return (entry is not None and entry.get('src') == src and self.path.exists()
+                and self.path.stat().st_mtime >= image_path.stat().st_mtime)
+
+    def save(self):
+        """Write the manifest if it changed, dropping thumbnails that no longer exist."""
+        for name, entry in list(self.entries.items()):
+            if not (self.root_dir / entry.get('src', '').lstrip('/')).exists():
+                del self.entries[name]
+                self._dirty = True
+
+        if not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+            f.write('\n')
+        self._dirty = False
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Toolchain Probe for GitFichas Mermaid Generator
+===============================================
+
+Resolves Node.js and the Mermaid CLI once and remembers the result in
+.mermaid-cache/toolchain.json, so later runs don't spawn `npx` (which may hit
+the network) just to find out what is installed.
+
+The recorded state is reused until it is stale: a different PATH, a missing
+Mermaid CLI, or a recorded executable or module that moved or was modified
+(upgraded or reinstalled). Checking that only takes a few stat() calls.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+STATE_VERSION = 1
+
+
+class ToolchainError(RuntimeError):
+    """Raised when Node.js or the Mermaid CLI can't be found."""
+
+
+def _run(cmd: list) -> Optional[str]:
+    """Run a command and return its stripped output, or None if it fails."""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError:
+        return None
+
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _describe(path: Optional[str]) -> Optional[Dict]:
+    """Record an executable's path, version and modification time."""
+    if path is None:
+        return None
+
+    return {
+        'path': path,
+        'version': _run([path, '--version']),
+        'mtime': os.stat(path).st_mtime
+    }
+
+
+def find_mmdc(root_dir: Path) -> Optional[str]:
+    """Locate the mmdc executable: project node_modules, PATH, then the global npm prefix."""
+    local_path = root_dir / 'node_modules' / '.bin' / 'mmdc'
+    if local_path.exists():
+        return str(local_path.resolve())
+
+    path = shutil.which('mmdc')
+    if path:
+        return path
+
+    prefix = _run(['npm', 'prefix', '-g'])
+    if prefix:
+        global_path = Path(prefix) / 'bin' / 'mmdc'
+        if global_path.exists():
+            return str(global_path)
+
+    return None
+
+
+def find_mermaid_cli_module(mmdc_path: Optional[str] = None) -> Optional[Path]:
+    """Locate mermaid-cli's entry module, next to mmdc if known, else under the global npm root."""
+    if mmdc_path:
+        # mmdc is a symlink to <package>/src/cli.js
+        module_path = Path(mmdc_path).resolve().parent / 'index.js'
+        if module_path.exists():
+            return module_path
+
+    npm_root = _run(['npm', 'root', '-g'])
+    if not npm_root:
+        return None
+
+    module_path = Path(npm_root) / '@mermaid-js' / 'mermaid-cli' / 'src' / 'index.js'
+    return module_path if module_path.exists() else None
+
+
+def probe_toolchain(root_dir: Path) -> Dict:
+    """Resolve Node.js and the Mermaid CLI from scratch."""
+    node_path = shutil.which('node')
+    if node_path is None:
+        raise ToolchainError("Node.js not found. Please install Node.js first.")
+
+    mmdc_path = find_mmdc(root_dir)
+    module_path = find_mermaid_cli_module(mmdc_path)
+
+    return {
+        'version': STATE_VERSION,
+        'probed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'path_env': os.environ.get('PATH', ''),
+        'node': _describe(node_path),
+        'mmdc': _describe(mmdc_path),
+        'module_path': str(module_path) if module_path else None
+    }
+
+
+def is_stale(state: Dict) -> bool:
+    """Check whether a recorded toolchain may no longer match what is installed."""
+    if state.get('version') != STATE_VERSION or state.get('path_env') != os.environ.get('PATH', ''):
+        return True
+
+    if state.get('mmdc') is None:
+        return True
+
+    for tool in (state.get('node'), state.get('mmdc')):
+        try:
+            if tool is None or os.stat(tool['path']).st_mtime != tool['mtime']:
+                return True
+        except OSError:
+            return True
+
+    module_path = state.get('module_path')
+    return bool(module_path) and not Path(module_path).exists()
+
+
+def load_toolchain(state_path: Path, root_dir: Path, refresh: bool = False) -> Dict:
+    """Get the toolchain, re-probing and saving it only when the recorded state is missing or stale."""
+    if not refresh:
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if not is_stale(state):
+                return state
+        except (OSError, ValueError):
+            pass
+
+    state = probe_toolchain(root_dir)
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = state_path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_path, state_path)
+
+    return state
@@ -4,10 +4,51 @@ Statistics and Logging for GitFichas Mermaid Generator
 =====================================================
 
 Handles statistics tracking and logging functionality.
+
+Besides counters, StatsTracker keeps per-post stage timings (read, parse,
+syntax, render, post_process, write), run-wide stage timings (css) and the
+size of every written SVG, summarized as percentiles and exported as a JSON
+run report (--report).
 """
 
+import json
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Per-post stages in pipeline order; css is built once per run
+POST_STAGES = ['read', 'parse', 'syntax', 'render', 'post_process', 'write']
+REPORT_PERCENTILES = [50, 90, 95, 99]
+
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for humans."""
+    if abs(size) < 1024:
+        return f"{size} B"
+    return f"{size / 1024:.1f} KB"
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Percentile of values by linear interpolation between closest ranks."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+
+    rank = (len(ordered) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count, total, mean, percentiles and maximum of values."""
+    summary = {'count': len(values), 'total': sum(values), 'mean': sum(values) / len(values) if values else 0.0}
+    for percent in REPORT_PERCENTILES:
+        summary[f'p{percent}'] = percentile(values, percent)
+    summary['max'] = max(values, default=0.0)
+    return summary
 
 
 class StatsTracker:
@@ -18,38 +59,192 @@ class StatsTracker:
             'total_processed': 0,
             'total_success': 0,
             'total_skipped': 0,
+            'total_cached': 0,
+            'total_deduplicated': 0,
+            'total_identical': 0,
+            'total_unchanged': 0,
             'total_errors': 0
         }
+        self.size_changes: Dict[str, List[Tuple[str, int, int]]] = {}
+        self.load_timings: Dict[str, Dict[str, float]] = {}
+        self.render_attempts: Dict[str, Dict[str, int]] = {}
+        self.posts: Dict[str, Dict[str, Any]] = {}
+        self.run_stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _increment(self, key: str, count: int = 1):
+        """Increment a counter; safe to call from worker threads."""
+        with self._lock:
+            self.stats[key] += count
 
     def increment_processed(self):
         """Increment processed count."""
-        self.stats['total_processed'] += 1
+        self._increment('total_processed')
 
     def increment_success(self):
         """Increment success count."""
-        self.stats['total_success'] += 1
+        self._increment('total_success')
 
     def increment_skipped(self):
         """Increment skipped count."""
-        self.stats['total_skipped'] += 1
+        self._increment('total_skipped')
+
+    def increment_cached(self):
+        """Increment count of images copied from the render cache."""
+        self._increment('total_cached')
+
+    def increment_deduplicated(self):
+        """Increment count of renders avoided by reusing an identical diagram rendered in this run."""
+        self._increment('total_deduplicated')
+
+    def increment_identical(self):
+        """Increment count of rendered images identical to the file on disk, which was left untouched."""
+        self._increment('total_identical')
+
+    def increment_unchanged(self, count: int = 1):
+        """Increment count of posts short-circuited by change detection (never read)."""
+        self._increment('total_unchanged', count)
 
     def increment_errors(self):
         """Increment error count."""
-        self.stats['total_errors'] += 1
+        self._increment('total_errors')
+
+    def record_load_timing(self, directory: str, files: int, indexed: int, bytes: int, seconds: float):
+        """Record how long loading a posts directory took and how many posts came from the index."""
+        with self._lock:
+            self.load_timings[directory] = {'files': files, 'indexed': indexed, 'bytes': bytes, 'seconds': seconds}
+
+    def record_render_attempts(self, label: str, attempts: int, retries: int, timeouts: int):
+        """Record a card whose render was retried or timed out."""
+        with self._lock:
+            self.render_attempts[label] = {'attempts': attempts, 'retries': retries, 'timeouts': timeouts}
+
+    def _get_post(self, post: str) -> Dict[str, Any]:
+        """Per-post record; the caller holds the lock."""
+        return self.posts.setdefault(post, {'image': None, 'stages': {}, 'size': None})
+
+    def record_stage(self, post: str, stage: str, seconds: float):
+        """Add time spent in a pipeline stage for a post (retried renders add up)."""
+        with self._lock:
+            stages = self._get_post(post)['stages']
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def time_stage(self, post: Optional[str], stage: str):
+        """Time the enclosed block as a stage of a post, or of the whole run when post is None."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if post is None:
+                with self._lock:
+                    self.run_stages[stage] = self.run_stages.get(stage, 0.0) + elapsed
+            else:
+                self.record_stage(post, stage, elapsed)
+
+    def record_output(self, post: str, image_path: Path, size: int):
+        """Record the image written for a post and its size in bytes."""
+        with self._lock:
+            record = self._get_post(post)
+            record['image'] = str(image_path)
+            record['size'] = size
+
+    def get_stage_summaries(self) -> Dict[str, Dict[str, float]]:
+        """Percentiles of every per-post stage, in pipeline order."""
+        with self._lock:
+            records = list(self.posts.values())
+
+        summaries = {}
+        for stage in POST_STAGES:
+            values = [record['stages'][stage] for record in records if stage in record['stages']]
+            if values:
+                summaries[stage] = summarize(values)
+        return summaries
+
+    def get_report(self) -> Dict[str, Any]:
+        """Everything recorded during the run, as JSON-serializable data."""
+        stage_summaries = self.get_stage_summaries()
+
+        with self._lock:
+            sizes = [record['size'] for record in self.posts.values() if record['size'] is not None]
+            return {
+                'counts': self.stats.copy(),
+                'run_stages': dict(self.run_stages),
+                'stages': stage_summaries,
+                'output_sizes': summarize(sizes),
+                'load_timings': dict(self.load_timings),
+                'size_changes': {stage: [{'image': image, 'before': before, 'after': after}
+                                         for image, before, after in changes]
+                                 for stage, changes in self.size_changes.items()},
+                'render_attempts': dict(self.render_attempts),
+                'posts': {post: dict(record) for post, record in self.posts.items()}
+            }
+
+    def write_report(self, report_path: Path, extra: Optional[Dict[str, Any]] = None):
+        """Write the run report as JSON, with extra top-level fields (e.g. options)."""
+        report = {'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'), **(extra or {}), **self.get_report()}
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    def record_size_change(self, stage: str, image_path: Path, before: int, after: int):
+        """Record an image's size before and after a post-processing stage."""
+        with self._lock:
+            self.size_changes.setdefault(stage, []).append((str(image_path), before, after))
 
     def get_stats(self) -> Dict[str, int]:
         """Get current statistics."""
-        return self.stats.copy()
+        with self._lock:
+            return self.stats.copy()
 
     def print_summary(self, images_dir: Path):
         """Print processing summary."""
         print(f"\n=== Summary ===")
         print(f"Total files processed: {self.stats['total_processed']}")
         print(f"Images generated: {self.stats['total_success']}")
+        if self.stats['total_identical'] > 0:
+            print(f"Rendered but identical (files left untouched): {self.stats['total_identical']}")
+        print(f"Copied from cache: {self.stats['total_cached']}")
+        if self.stats['total_deduplicated'] > 0:
+            print(f"Identical diagrams reused (renders avoided): {self.stats['total_deduplicated']}")
         print(f"Skipped: {self.stats['total_skipped']}")
+        if self.stats['total_unchanged'] > 0:
+            print(f"Short-circuited (unchanged, not read): {self.stats['total_unchanged']}")
         print(f"Failed: {self.stats['total_errors']}")
 
-        if self.stats['total_success'] > 0:
+        for directory, timing in self.load_timings.items():
+            print(f"Loaded {directory}: {timing['files']} posts ({timing['indexed']} from index), "
+                  f"{format_bytes(timing['bytes'])} read in {timing['seconds'] * 1000:.1f} ms")
+
+        if self.render_attempts:
+            retries = sum(report['retries'] for report in self.render_attempts.values())
+            timeouts = sum(report['timeouts'] for report in self.render_attempts.values())
+            print(f"Render retries: {retries}, timeouts: {timeouts}")
+            for label, report in self.render_attempts.items():
+                print(f"  {label}: {report['attempts']} attempts, {report['timeouts']} timed out")
+
+        stage_summaries = self.get_stage_summaries()
+        if stage_summaries or self.run_stages:
+            print("Stage timings (ms):     total     p50     p90     p95     max")
+            for stage, seconds in self.run_stages.items():
+                print(f"  {stage:<16} {seconds * 1000:>9.1f}")
+            for stage, summary in stage_summaries.items():
+                print(f"  {stage:<16} {summary['total'] * 1000:>9.1f} {summary['p50'] * 1000:>7.1f} "
+                      f"{summary['p90'] * 1000:>7.1f} {summary['p95'] * 1000:>7.1f} {summary['max'] * 1000:>7.1f}")
+
+        sizes = [record['size'] for record in self.posts.values() if record['size'] is not None]
+        if sizes:
+            print(f"Output sizes: {len(sizes)} images, {format_bytes(sum(sizes))} total, "
+                  f"median {format_bytes(int(percentile(sizes, 50)))}, max {format_bytes(max(sizes))}")
+
+        for stage, changes in self.size_changes.items():
+            before = sum(change[1] for change in changes)
+            after = sum(change[2] for change in changes)
+            print(f"{stage}: {len(changes)} images, {format_bytes(before)} → {format_bytes(after)} "
+                  f"(saved {format_bytes(before - after)})")
+
+        if self.stats['total_success'] + self.stats['total_cached'] + self.stats['total_deduplicated'] > 0:
             print(f"\n✅ Generated images in: {images_dir}")
             print(f"\n💡 To use static images, add 'use_static_image: true' to post front matter")
 
@@ -59,12 +254,38 @@ class Logger:
 
     def __init__(self, verbose: bool = False):
         self.verbose = verbose
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def section(self):
+        """Buffer messages logged by this thread and print them together at the end.
+
+        Keeps the output of one post in one piece when posts are processed in parallel.
+        """
+        self._local.buffer = []
+        try:
+            yield
+        finally:
+            lines, self._local.buffer = self._local.buffer, None
+            if lines:
+                with self._lock:
+                    print("\n".join(lines))
+
+    def _emit(self, line: str):
+        """Print a line, or buffer it while a section is open on this thread."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(line)
+        else:
+            with self._lock:
+                print(line)
 
     def log(self, message: str, level: str = "INFO"):
         """Log message with optional verbose output."""
         if level == "ERROR" or self.verbose:
             prefix = f"[{level}]" if level != "INFO" else ""
-            print(f"{prefix} {message}")
+            self._emit(f"{prefix} {message}")
 
     def info(self, message: str):
         """Log info message."""
@@ -76,12 +297,12 @@ class Logger:
 
     def success(self, message: str):
         """Log success message (always shown)."""
-        print(f"✓ {message}")
+        self._emit(f"✓ {message}")
 
     def warning(self, message: str):
         """Log warning message (always shown)."""
-        print(f"⚠ {message}")
+        self._emit(f"⚠ {message}")
 
     def failure(self, message: str):
         """Log failure message (always shown)."""
-        print(f"✗ {message}")
+        self._emit(f"✗ {message}")
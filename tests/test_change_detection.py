@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Change detection regression tests: a post selected by --changed-since or
+--incremental must be re-rendered even when the render cache is cold (a fresh
+clone or CI run), since an existing image says nothing about its inputs.
+
+Run with: python3 -m unittest discover -s tests
+"""
+
+import contextlib
+import io
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+from generate_images_only import MermaidImageOnlyGenerator
+
+POST = Path('_posts') / '2024-10-26-053.md'
+SITE_FILES = [
+    Path('gitfichas-mermaid-theme.json'),
+    Path('assets') / 'css' / 'embedded-svg.css',
+    Path('assets') / 'css' / 'embedded-fonts.css',
+    POST,
+]
+
+
+class ColdCacheTest(unittest.TestCase):
+    """An edited post is re-rendered after the render cache is removed."""
+
+    def setUp(self):
+        self.project = Path(tempfile.mkdtemp(prefix='gitfichas-test-'))
+        for relative_path in SITE_FILES:
+            (self.project / relative_path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(REPO_ROOT / relative_path, self.project / relative_path)
+
+        self.generate()
+        self.image_path = self.project / 'assets' / 'img' / 'mermaid' / '053.svg'
+        self.assertTrue(self.image_path.exists())
+
+        self.git('init', '-q')
+        self.git('add', '-A')
+        self.git('-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'site')
+
+        # A fresh clone: the cache is gitignored, the committed image is there
+        shutil.rmtree(self.project / '.mermaid-cache')
+        post_path = self.project / POST
+        post_path.write_text(post_path.read_text(encoding='utf-8').replace(
+            'comando para \\nmostrar o histórico', 'comando para \\nmostrar o log'), encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.project, ignore_errors=True)
+
+    def git(self, *args: str):
+        subprocess.run(['git', *args], cwd=self.project, check=True, capture_output=True)
+
+    def generate(self, **options) -> dict:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = MermaidImageOnlyGenerator(str(self.project), backend='stub', jobs=1, timeout=None, retries=0)
+            generator.process_files(**options)
+        return generator.stats.get_stats()
+
+    def assert_rendered(self, stats: dict):
+        self.assertEqual(stats['total_success'], 1)
+        self.assertEqual(stats['total_skipped'], 0)
+        self.assertIn('mostrar o log', self.image_path.read_text(encoding='utf-8'))
+
+    def test_changed_since(self):
+        self.assert_rendered(self.generate(changed_since='HEAD'))
+
+    def test_incremental(self):
+        self.assert_rendered(self.generate(incremental=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Render service tests, with the stub renderer: cache hits and misses, LRU
+eviction, JSON error bodies and a theme change while a render is in flight.
+
+Run with: python3 -m unittest discover -s tests
+"""
+
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+from config_manager import ConfigManager
+from render_server import RenderService, SvgLruCache, create_server
+from renderers import StubRenderer
+
+POST = Path('_posts') / '2024-10-26-053.md'
+SITE_FILES = [
+    Path('gitfichas-mermaid-theme.json'),
+    Path('assets') / 'css' / 'embedded-svg.css',
+    Path('assets') / 'css' / 'embedded-fonts.css',
+    POST,
+]
+
+DRAFT = """---
+mermaid: true
+command: git init
+descriptors:
+  - command: comando para iniciar\\n o repositório git
+---
+"""
+
+
+class SvgLruCacheTest(unittest.TestCase):
+    """The LRU is bounded by total size and evicts the least recently used SVG."""
+
+    def test_eviction(self):
+        cache = SvgLruCache(max_bytes=10)
+        cache.put('a', b'aaaa')
+        cache.put('b', b'bbbb')
+        self.assertEqual(cache.get('a'), b'aaaa')
+        cache.put('c', b'cccc')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'aaaa')
+        self.assertEqual(cache.get('c'), b'cccc')
+        stats = cache.get_stats()
+        self.assertEqual((stats['evictions'], stats['entries'], stats['bytes']), (1, 2, 8))
+
+    def test_larger_than_cache(self):
+        cache = SvgLruCache(max_bytes=4)
+        cache.put('a', b'aaaaa')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get_stats()['entries'], 0)
+
+
+class RenderServerTest(unittest.TestCase):
+    """HTTP requests against a service with a (slow) stub renderer."""
+
+    RENDER_DELAY = 0.5
+
+    def setUp(self):
+        self.project = Path(tempfile.mkdtemp(prefix='gitfichas-test-'))
+        for relative_path in SITE_FILES:
+            (self.project / relative_path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(REPO_ROOT / relative_path, self.project / relative_path)
+
+        self.config = ConfigManager(str(self.project))
+        self.renderers = []
+        self.service = RenderService(self.config, self.create_renderer, 1 << 20, timeout=10)
+        self.service.start()
+        self.server = create_server(self.service, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        shutil.rmtree(self.project, ignore_errors=True)
+
+    def create_renderer(self) -> StubRenderer:
+        renderer = StubRenderer(self.config, delay=self.RENDER_DELAY)
+        self.renderers.append(renderer)
+        return renderer
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=10)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.getheader('Content-Type'), response.getheader('X-Cache'), response.read()
+        finally:
+            connection.close()
+
+    def assert_json_error(self, response, status: int):
+        self.assertEqual(response[0], status)
+        self.assertEqual(response[1], 'application/json')
+        self.assertIn('error', json.loads(response[3]))
+
+    def test_hit_and_miss(self):
+        first = self.request('POST', '/render', DRAFT.encode('utf-8'))
+        second = self.request('GET', f'/render?path={POST.as_posix()}')
+        third = self.request('POST', '/render', DRAFT.encode('utf-8'))
+
+        self.assertEqual((first[0], first[1], first[2]), (200, 'image/svg+xml', 'miss'))
+        self.assertEqual((second[0], second[2]), (200, 'miss'))
+        self.assertEqual((third[0], third[2], third[3]), (200, 'hit', first[3]))
+
+        stats = json.loads(self.request('GET', '/stats')[3])
+        self.assertEqual((stats['cache']['hits'], stats['cache']['misses']), (1, 2))
+        self.assertEqual(stats['backend'], 'stub')
+
+    def test_error_bodies(self):
+        self.assert_json_error(self.request('POST', '/render', b'mermaid: true\ncommand: git init\ndescriptors: 5'), 400)
+        self.assert_json_error(self.request('POST', '/render', b'{"front_matter": 5}',
+                                            {'Content-Type': 'application/json'}), 400)
+        self.assert_json_error(self.request('POST', '/render', b'{not json', {'Content-Type': 'application/json'}), 400)
+        self.assert_json_error(self.request('POST', '/render', b'\xff\xfe'), 400)
+        self.assert_json_error(self.request('GET', '/render?path=_posts/missing.md'), 404)
+        self.assert_json_error(self.request('GET', '/render?path=../secret.md'), 400)
+        self.assert_json_error(self.request('GET', '/render'), 400)
+        self.assert_json_error(self.request('GET', '/nowhere'), 404)
+
+    def test_refresh_during_render(self):
+        results = []
+        in_flight = threading.Thread(
+            target=lambda: results.append(self.request('POST', '/render', DRAFT.encode('utf-8'))))
+        in_flight.start()
+        time.sleep(self.RENDER_DELAY / 2)
+
+        # The next request rebuilds the CSS and replaces the renderer once the render in flight is done
+        stat = self.config.theme_path.stat()
+        os.utime(self.config.theme_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        after = self.request('GET', f'/render?path={POST.as_posix()}')
+        stats = self.request('GET', '/stats')
+        in_flight.join(timeout=10)
+
+        self.assertFalse(in_flight.is_alive())
+        self.assertEqual(results[0][0], 200)
+        self.assertEqual(after[0], 200)
+        self.assertEqual(stats[0], 200)
+        self.assertEqual(len(self.renderers), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()